@@ -0,0 +1,135 @@
+# agents.py
+import os, logging, time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+import models
+
+logger = logging.getLogger("registry.agents")
+
+# How long /agent/poll holds a request open waiting for a job, and how often it checks meanwhile
+POLL_WAIT_SECONDS = int(os.environ.get("AGENT_POLL_WAIT_SECONDS", "20"))
+POLL_INTERVAL_SECONDS = 1.0
+# Container output kept per job (the most recent part)
+LOG_TAIL_CHARS = int(os.environ.get("AGENT_LOG_TAIL_CHARS", "65536"))
+# Claimed/running jobs whose agent sent nothing for this long (agents report every few seconds) are
+# requeued/failed, and queued jobs no agent claims within AGENT_QUEUE_TIMEOUT_SECONDS are failed
+JOB_TIMEOUT_SECONDS = int(os.environ.get("AGENT_JOB_TIMEOUT_SECONDS", "120"))
+QUEUE_TIMEOUT_SECONDS = int(os.environ.get("AGENT_QUEUE_TIMEOUT_SECONDS", "600"))
+
+ACTIONS = ("start", "stop")
+AGENT_STATUSES = ("running", "succeeded", "failed")
+
+
+def create_jobs(db, req):
+    """
+    Queue one job per server of the request.
+
+    Returns:
+        list of the created AgentJob rows
+    """
+    now = datetime.utcnow()
+    jobs = [
+        models.AgentJob(
+            run_id=req.run_id,
+            servername=server,
+            action=req.action,
+            spec=req.spec.dict(),
+            status="queued",
+            created_at=now,
+            updated_at=now
+        )
+        for server in req.servers
+    ]
+    db.add_all(jobs)
+    db.commit()
+    return jobs
+
+
+def claim_job(db, servername):
+    """
+    Hand the oldest queued job of a server to its agent. SKIP LOCKED keeps two
+    concurrent polls (e.g. an agent restarted mid-poll) from claiming the same job.
+    """
+    job = (
+        db.query(models.AgentJob)
+        .filter(models.AgentJob.servername == servername)
+        .filter(models.AgentJob.status == "queued")
+        .order_by(models.AgentJob.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()  # don't keep a transaction open between checks
+        return None
+    job.status = "claimed"
+    job.updated_at = datetime.utcnow()
+    db.commit()
+    return job
+
+
+def wait_for_job(db, servername, wait):
+    deadline = time.monotonic() + wait
+    while True:
+        job = claim_job(db, servername)
+        if job is not None or time.monotonic() >= deadline:
+            return job
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def update_status(db, job_id, status, exit_code=None, log=None):
+    """
+    Record progress reported by an agent; 'log' is appended to the job's log tail.
+
+    Returns:
+        the updated AgentJob, or None if there is no such job
+    """
+    job = db.query(models.AgentJob).filter(models.AgentJob.id == job_id).with_for_update().first()
+    if job is None:
+        return None
+    job.status = status
+    if exit_code is not None:
+        job.exit_code = exit_code
+    if log:
+        job.log_tail = ((job.log_tail or "") + log)[-LOG_TAIL_CHARS:]
+    job.updated_at = datetime.utcnow()
+    db.commit()
+    return job
+
+
+def expire_stale_jobs(db):
+    """
+    Recover jobs whose agent went away: a claimed job is queued again (its agent died
+    before starting it, a restarted agent picks it up), a running job is failed, and a
+    job still queued after QUEUE_TIMEOUT_SECONDS (no agent on that server) is failed.
+
+    Returns:
+        list of the jobs changed
+    """
+    now = datetime.utcnow()
+    silent = now - timedelta(seconds=JOB_TIMEOUT_SECONDS)
+    stale = (
+        db.query(models.AgentJob)
+        .filter(or_(
+            and_(models.AgentJob.status.in_(("claimed", "running")), models.AgentJob.updated_at < silent),
+            and_(models.AgentJob.status == "queued",
+                 models.AgentJob.updated_at < now - timedelta(seconds=QUEUE_TIMEOUT_SECONDS))
+        ))
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in stale:
+        if job.status == "claimed":
+            job.status = "queued"
+            note = f"[WARN] Agent claimed the job but did not start it within {JOB_TIMEOUT_SECONDS}s, queued again\n"
+        elif job.status == "running":
+            job.status = "failed"
+            note = f"[ERROR] Agent stopped reporting for {JOB_TIMEOUT_SECONDS}s\n"
+        else:
+            job.status = "failed"
+            note = f"[ERROR] No runner agent claimed the job within {QUEUE_TIMEOUT_SECONDS}s\n"
+        job.log_tail = ((job.log_tail or "") + note)[-LOG_TAIL_CHARS:]
+        job.updated_at = now
+    db.commit()
+    if stale:
+        logger.warning(f"Recovered stale agent jobs: {[(str(j.id), j.servername, j.status) for j in stale]}")
+    return stale
@@ -0,0 +1,130 @@
+# allocations.py
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func
+import models
+
+# Allowed difference between the sum of the per-worker factors and the execution's factor
+FACTOR_TOLERANCE = Decimal("0.01")
+
+
+def worker_shares(factor, workers, worker_factors=None):
+    """
+    Factor allocated to each entry of workers, in the same order.
+
+    Args:
+        factor: the execution's total factor
+        workers: server names
+        worker_factors: factor per worker in the same order as workers (default: even split)
+
+    Returns:
+        list of Decimal, one per entry of workers
+
+    Raises:
+        ValueError: if worker_factors doesn't match workers or doesn't add up to factor
+    """
+    factor = Decimal(str(factor))
+    if worker_factors is None:
+        worker_factors = [factor / len(workers)] * len(workers) if workers else []
+    else:
+        worker_factors = [Decimal(str(f)) for f in worker_factors]
+        if len(worker_factors) != len(workers):
+            raise ValueError(f"worker_factors has {len(worker_factors)} entries for {len(workers)} workers")
+        if any(f < 0 for f in worker_factors) or abs(sum(worker_factors) - factor) > FACTOR_TOLERANCE:
+            raise ValueError(f"worker_factors must not be negative and must add up to factor {factor}")
+    return worker_factors
+
+
+def split_factor(factor, workers, worker_factors=None):
+    """
+    Factor allocated to each worker of an execution.
+
+    Args:
+        factor: the execution's total factor
+        workers: server names, a server listed twice gets two shares
+        worker_factors: factor per worker in the same order as workers (default: even split)
+
+    Returns:
+        dict of servername to allocated factor
+
+    Raises:
+        ValueError: if worker_factors doesn't match workers or doesn't add up to factor
+    """
+    shares = {}
+    for worker, share in zip(workers, worker_shares(factor, workers, worker_factors)):
+        shares[worker] = shares.get(worker, 0) + share
+    return shares
+
+
+def record(db, test, worker_factors=None):
+    """
+    Store the factor allocated to each worker of a newly registered execution.
+    Runs in the caller's transaction; the caller commits.
+    """
+    for servername, share in split_factor(test.factor, test.workers or [], worker_factors).items():
+        db.add(models.ExecutionWorker(
+            execution_id=test.id,
+            servername=servername,
+            run_id=test.run_id,
+            location=test.location,
+            environment=test.environment,
+            factor=share,
+            start_time=test.start_time
+        ))
+
+
+def release(db, test):
+    """
+    Free the workers of an execution that is no longer running.
+    Runs in the caller's transaction; the caller commits.
+    """
+    (
+        db.query(models.ExecutionWorker)
+        .filter(models.ExecutionWorker.execution_id == test.id)
+        .filter(models.ExecutionWorker.end_time.is_(None))
+        .update({models.ExecutionWorker.end_time: test.end_time or datetime.utcnow()}, synchronize_session=False)
+    )
+
+
+def running_load(db, location=None, environment=None):
+    """
+    Subquery with the factor allocated to each worker by running executions:
+    servername, location, environment, running_sum. Only reads the partial
+    index over running allocations.
+    """
+    query = (
+        db.query(
+            models.ExecutionWorker.servername,
+            models.ExecutionWorker.location,
+            models.ExecutionWorker.environment,
+            func.sum(models.ExecutionWorker.factor).label("running_sum")
+        )
+        .filter(models.ExecutionWorker.end_time.is_(None))
+    )
+    if location is not None:
+        query = query.filter(models.ExecutionWorker.location == location)
+    if environment is not None:
+        query = query.filter(models.ExecutionWorker.environment == environment)
+    return query.group_by(
+        models.ExecutionWorker.servername,
+        models.ExecutionWorker.location,
+        models.ExecutionWorker.environment
+    ).subquery()
+
+
+def shares(db, execution_ids):
+    """
+    Returns:
+        dict of execution id to [(servername, allocated factor)]
+    """
+    result = {}
+    if not execution_ids:
+        return result
+    rows = (
+        db.query(models.ExecutionWorker.execution_id, models.ExecutionWorker.servername, models.ExecutionWorker.factor)
+        .filter(models.ExecutionWorker.execution_id.in_(execution_ids))
+        .all()
+    )
+    for row in rows:
+        result.setdefault(row.execution_id, []).append((row.servername, float(row.factor)))
+    return result
@@ -9,12 +9,17 @@ from database import engine, get_db
 from datetime import datetime
 import uuid
 from . import schemas
+import rollups
+import events
+import allocations
 
 router = APIRouter()
 
 @router.post("/register")
 def register_test(req: schemas.RegisterRequest, db: Session = Depends(get_db)):
 
+    events.lock(db)
+
     # Find the current max run_id
     max_run_id = db.query(models.TestExecution.run_id).order_by(models.TestExecution.run_id.desc()).first()
     next_run_id = (max_run_id[0] + 1) if max_run_id and max_run_id[0] is not None else 1
@@ -42,12 +47,16 @@ def register_test(req: schemas.RegisterRequest, db: Session = Depends(get_db)):
         script_version=req.script_version
     )
     db.add(new_test)
+    rollups.record_registration(db, new_test)
+    allocations.record(db, new_test)
+    events.record_execution(db, new_test)
     db.commit()
     db.refresh(new_test)
     return {"message": "Test registered", "run_id": str(next_run_id), "test_id": str(test_id)}
 
 @router.post("/complete")
 def complete_test(req: schemas.CompleteRequest, db: Session = Depends(get_db)):
+    events.lock(db)
     test = db.query(models.TestExecution).filter(
         models.TestExecution.run_id == req.run_id,
         models.TestExecution.status == "running"
@@ -56,6 +65,9 @@ def complete_test(req: schemas.CompleteRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Running test not found")
     test.status = req.status
     test.end_time = datetime.utcnow()
+    rollups.record_status_change(db, test, "running")
+    allocations.release(db, test)
+    events.record_execution(db, test)
     db.commit()
     return {"message": "Test marked as complete"}
 
@@ -162,6 +174,7 @@ def set_location_status(
     status: str = Query(..., description="New status"),
     db: Session = Depends(get_db)
 ):
+    events.lock(db)
     loc = (
         db.query(models.Location)
         .filter(models.Location.location == location)
@@ -171,6 +184,7 @@ def set_location_status(
     if not loc:
         raise HTTPException(status_code=404, detail="Location/server not found")
     loc.status = status
+    events.record(db, "location_status", location=location, servername=servername, status=status)
     db.commit()
     return {"location": location, "servername": servername, "status": status}
 
@@ -5,19 +5,39 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func, literal_column
 import models
-from database import engine, get_db
+from database import engine, get_db, get_read_db, replicas
 from datetime import datetime
+from typing import List
 import uuid
 from . import schemas
-from security import get_api_key  # Import the API key dependency
+from security import get_api_key, api_keys  # Import the API key dependency
+import profiling
+from serialization import FastJSONResponse, schema_columns, rows_to_dicts
+from throttling import coalescer
+import rollups
+import telemetry
+import predictions
+import agents
+import events
+import allocations
 
 router = APIRouter()
 
+# Columns returned by the list endpoints, precomputed once from the response schema
+EXECUTION_COLUMNS = schema_columns(models.TestExecution, schemas.TestExecutionSchema)
+
 @router.post("/register")
 def register_test(req: schemas.RegisterRequest, 
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)):
 
+    try:
+        shares = allocations.worker_shares(req.factor, req.workers, req.worker_factors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    events.lock(db)
+
     # Find the current max run_id
     max_run_id = db.query(models.TestExecution.run_id).order_by(models.TestExecution.run_id.desc()).first()
     next_run_id = (max_run_id[0] + 1) if max_run_id and max_run_id[0] is not None else 1
@@ -45,16 +65,23 @@ def register_test(req: schemas.RegisterRequest,
         script_version=req.script_version  # New field for script version
     )
     db.add(new_test)
+    rollups.record_registration(db, new_test)
+    allocations.record(db, new_test, req.worker_factors)
     db.flush()
+    events.record_execution(db, new_test)
     db.commit()
     db.refresh(new_test)
-    return {"message": "Test registered", "run_id": str(next_run_id), "test_id": str(test_id)}
+    coalescer.invalidate("status", "locations")
+    # Per-worker factors in workers order; run-test-performance-jmeter.sh splits the test data by them
+    return {"message": "Test registered", "run_id": str(next_run_id), "test_id": str(test_id),
+            "worker_factors": [float(share) for share in shares]}
 
 @router.post("/complete")
 def complete_test(req: schemas.CompleteRequest, 
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)):
 
+    events.lock(db)
     test = db.query(models.TestExecution).filter(
         models.TestExecution.run_id == req.run_id,
         models.TestExecution.status == "running"
@@ -63,58 +90,160 @@ def complete_test(req: schemas.CompleteRequest,
         raise HTTPException(status_code=404, detail="Running test not found")
     test.status = req.status
     test.end_time = datetime.utcnow()
+    rollups.record_status_change(db, test, "running")
+    allocations.release(db, test)
+    events.record_execution(db, test)
     db.commit()
+    coalescer.invalidate("status", "locations")
+    predictions.durations.record(test)
     return {"message": "Test marked as complete"}
 
-@router.get("/status", response_model=dict)
+@router.post("/heartbeat")
+def heartbeat_test(req: schemas.HeartbeatRequest,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)):
+
+    # Runners call this periodically while a test is active; see reaper.py
+    updated = (
+        db.query(models.TestExecution)
+        .filter(models.TestExecution.run_id == req.run_id)
+        .filter(models.TestExecution.status == "running")
+        .update({models.TestExecution.last_heartbeat: datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    if not updated:
+        raise HTTPException(status_code=404, detail="Running test not found")
+    return {"message": "Heartbeat received"}
+
+@router.post("/telemetry")
+def post_worker_telemetry(req: schemas.TelemetryRequest,
+    api_key: str = Depends(get_api_key)):
+
+    # Kept in memory and persisted as one-minute averages by telemetry.py
+    telemetry.buffer.add(req.servername, req.dict(exclude={"servername"}))
+    return {"message": "Telemetry received"}
+
+@router.post("/agent/jobs")
+def create_agent_jobs(req: schemas.AgentJobRequest,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)):
+    """
+    Queue a container start/stop for the runner agent of each server.
+
+    Returns:
+        JSON object mapping server name to job id
+    """
+    if req.action not in agents.ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid action '{req.action}', expected one of {agents.ACTIONS}")
+    jobs = agents.create_jobs(db, req)
+    return {"message": "Jobs queued", "jobs": {job.servername: str(job.id) for job in jobs}}
+
+@router.get("/agent/jobs", response_model=List[schemas.AgentJobSchema])
+def list_agent_jobs(
+    run_id: int = Query(..., description="Run ID to filter"),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)
+):
+    return (
+        db.query(models.AgentJob)
+        .filter(models.AgentJob.run_id == run_id)
+        .order_by(models.AgentJob.created_at)
+        .all()
+    )
+
+@router.get("/agent/poll")
+def poll_agent_job(
+    servername: str = Query(..., description="Server the agent runs on"),
+    wait: int = Query(agents.POLL_WAIT_SECONDS, ge=0, le=60, description="Seconds to wait for a job"),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Long poll used by runner agents: claims the next queued job of the server.
+
+    Returns:
+        the claimed job, or 204 No Content if none was queued within 'wait' seconds
+    """
+    job = agents.wait_for_job(db, servername, wait)
+    if job is None:
+        return Response(status_code=204)
+    return schemas.AgentJobSchema.from_orm(job)
+
+@router.post("/agent/jobs/{job_id}/status")
+def update_agent_job(job_id: uuid.UUID, req: schemas.AgentJobStatusRequest,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)):
+
+    if req.status not in agents.AGENT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status '{req.status}', expected one of {agents.AGENT_STATUSES}")
+    if agents.update_status(db, job_id, req.status, req.exit_code, req.log) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"message": "Job status updated"}
+
+@router.get("/events")
+def get_events(
+    after: int = Query(0, ge=0, description="Offset of the last event already processed"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of events returned"),
+    wait: int = Query(events.WAIT_SECONDS, ge=0, le=60, description="Seconds to wait for new events"),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Read execution lifecycle events (register, complete, cancel, lost, location status) after an offset.
+
+    Long poll: when there is nothing after 'after' the request waits up to 'wait' seconds
+    for the next event (published with LISTEN/NOTIFY on the 'execution_events' channel).
+
+    Args:
+        after: offset of the last event already processed (0 to read from the beginning)
+        limit: maximum number of events returned
+        wait: seconds to wait when there are no new events
+
+    Returns:
+        JSON object with the events in offset order and 'last_offset' to pass as 'after' next time
+    """
+    new_events = events.wait_for_events(db, after, limit, wait)
+    return {
+        "events": [schemas.ExecutionEventSchema.from_orm(e) for e in new_events],
+        "last_offset": new_events[-1].id if new_events else after
+    }
+
+@router.get("/status", response_class=FastJSONResponse)
 def get_status(db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)):
 
-    running = db.query(models.TestExecution).filter(models.TestExecution.status == "running").all()
-    return {"running": [schemas.TestExecutionSchema.from_orm(t) for t in running]}
+    # Plain column tuples encoded straight to JSON (no ORM objects, no schema re-validation),
+    # shared between identical concurrent polls
+    running = coalescer.do("status", lambda: rows_to_dicts(
+        EXECUTION_COLUMNS,
+        db.query(*EXECUTION_COLUMNS)
+        .filter(models.TestExecution.status == "running")
+        .all()
+    ))
+    return FastJSONResponse({"running": running})
 
-@router.get("/history", response_model=dict)
-def get_history(db: Session = Depends(get_db),
+@router.get("/history", response_class=FastJSONResponse)
+def get_history(db: Session = Depends(get_read_db),
     api_key: str = Depends(get_api_key)):
 
     executions = (
-        db.query(models.TestExecution)
+        db.query(*EXECUTION_COLUMNS)
         .order_by(models.TestExecution.start_time.desc())
         .all()
     )
-    return {"executions": [schemas.TestExecutionSchema.from_orm(t) for t in executions]}
+    return FastJSONResponse({"executions": rows_to_dicts(EXECUTION_COLUMNS, executions)})
 
 @router.get("/locations")
-def get_location_factors(db: Session = Depends(get_db),
+def get_location_factors(db: Session = Depends(get_read_db),
     api_key: str = Depends(get_api_key)):
 
-    # Subquery: Explode workers and distribute factor
-    running_load_subquery = (
-        db.query(
-            func.jsonb_array_elements_text(models.TestExecution.workers).label("worker_name"),
-            models.TestExecution.location,
-            models.TestExecution.environment,
-            (models.TestExecution.factor / func.jsonb_array_length(models.TestExecution.workers)).label("worker_load")
-        )
-        .filter(models.TestExecution.status == "running")
-        .subquery()
-    )
+    # A replica may still be catching up, so its answer is shared with concurrent callers but not
+    # kept: the scheduler and runners make capacity decisions on it
+    return coalescer.do("locations", lambda: _location_factors(db), cache=not replicas.serves(db))
 
-    # Aggregate load per worker
-    worker_load_summary = (
-        db.query(
-            running_load_subquery.c.worker_name.label("servername"),
-            running_load_subquery.c.location,
-            running_load_subquery.c.environment,
-            func.sum(running_load_subquery.c.worker_load).label("running_sum")
-        )
-        .group_by(
-            running_load_subquery.c.worker_name,
-            running_load_subquery.c.location,
-            running_load_subquery.c.environment
-        )
-        .subquery()
-    )
+def _location_factors(db: Session):
+    # Factor allocated per worker by running executions (execution_workers)
+    worker_load_summary = allocations.running_load(db)
 
     # Main query: Join locations with load summary
     results = (
@@ -177,6 +306,7 @@ def set_location_status(
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)
 ):
+    events.lock(db)
     loc = (
         db.query(models.Location)
         .filter(models.Location.location == location)
@@ -186,7 +316,9 @@ def set_location_status(
     if not loc:
         raise HTTPException(status_code=404, detail="Location/server not found")
     loc.status = status
+    events.record(db, "location_status", location=location, servername=servername, status=status)
     db.commit()
+    coalescer.invalidate("locations")
     return {"location": location, "servername": servername, "status": status}
 
 @router.get("/workers")
@@ -194,38 +326,12 @@ def get_servers_to_run(
     location: str = Query(..., description="Location to filter servers"),
     environment: str = Query(..., description="Environment to filter servers"),
     factor: float = Query(..., gt=0, description="Total factor required"),
+    weight_by_headroom: bool = Query(False, description="Cap available factor by measured CPU/memory headroom"),
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)
 ):
-    # Subquery: Calculate load per worker (only if tests are running)
-    running_load_subquery = (
-        db.query(
-            func.jsonb_array_elements_text(models.TestExecution.workers).label("worker_name"),
-            (models.TestExecution.factor / func.jsonb_array_length(models.TestExecution.workers)).label("worker_load"),
-            models.TestExecution.location,
-            models.TestExecution.environment
-        )
-        .filter(models.TestExecution.status == "running")
-        .filter(models.TestExecution.environment == environment)
-        .filter(models.TestExecution.location == location)
-        .subquery()
-    )
-
-    # Aggregate load per worker
-    worker_load_summary = (
-        db.query(
-            running_load_subquery.c.worker_name.label("servername"),
-            running_load_subquery.c.location,
-            running_load_subquery.c.environment,
-            func.coalesce(func.sum(running_load_subquery.c.worker_load), 0).label("running_sum")
-        )
-        .group_by(
-            running_load_subquery.c.worker_name,
-            running_load_subquery.c.location,
-            running_load_subquery.c.environment
-        )
-        .subquery()
-    )
+    # Factor allocated per worker by running executions (execution_workers)
+    worker_load_summary = allocations.running_load(db, location, environment)
 
     # Main query: Join locations with load summary (handles empty load data)
     servers = (
@@ -260,6 +366,17 @@ def get_servers_to_run(
     available_factors = [float(row.available_factor) for row in servers]
     servernames = [row.servername for row in servers]
 
+    if weight_by_headroom:
+        # A server's share can't exceed what its measured resources leave free
+        measured = telemetry.headroom(db, servernames)
+        capped = [
+            min(af, float(row.location_factor) * measured[row.servername]) if row.servername in measured else af
+            for af, row in zip(available_factors, servers)
+        ]
+        order = sorted(range(len(servers)), key=lambda i: capped[i], reverse=True)
+        available_factors = [capped[i] for i in order]
+        servernames = [servernames[i] for i in order]
+
     # Determine how many servers are needed
     if factor <= 1:
         # Find a single server with enough available_factor
@@ -284,6 +401,50 @@ def get_servers_to_run(
             )
         }
 
+@router.get("/predict")
+def predict_duration(
+    lac: str = Query(..., description="LAC of the test"),
+    test: str = Query(..., description="Test ID"),
+    type: str = Query(..., description="Test type"),
+    db: Session = Depends(get_read_db),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Predict the duration of a new run from the successful runs of the same test.
+
+    Returns:
+        JSON object with sample count and median, MAD and p90 duration in seconds
+    """
+    return {"lac": lac, "test": test, "type": type, **predictions.durations.predict(db, lac, test, type)}
+
+@router.get("/forecast")
+def forecast_capacity(
+    location: str = Query(..., description="Location to forecast"),
+    environment: str = Query(..., description="Environment to forecast"),
+    hours: float = Query(6, gt=0, le=72, description="Forecast horizon in hours"),
+    step_minutes: int = Query(30, ge=5, description="Minutes between forecast points"),
+    db: Session = Depends(get_read_db),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Forecast free factor per worker server, assuming running tests end after their predicted p90 duration.
+
+    Returns:
+        JSON object with one entry per step: time, free factor per server and in total
+    """
+    running = (
+        db.query(models.TestExecution)
+        .filter(models.TestExecution.status == "running")
+        .filter(models.TestExecution.location == location)
+        .filter(models.TestExecution.environment == environment)
+        .all()
+    )
+    return {
+        "location": location,
+        "environment": environment,
+        "forecast": predictions.forecast(db, location, environment, hours, step_minutes, running)
+    }
+
 @router.get("/orchestrator")
 def get_orchestrator_server(
     location: str = Query(..., description="Location to filter for orchestrator"),
@@ -317,9 +478,12 @@ def get_configuration(parameter: str,
     Raises:
         HTTPException: 404 if parameter not found
     """
-    config = db.query(models.Configuration).filter(
+    # Runners poll parameters such as 'status' constantly; identical reads share one query
+    config = coalescer.do(f"configuration:{parameter}", lambda: db.query(
+        models.Configuration.parameter, models.Configuration.value
+    ).filter(
         models.Configuration.parameter == parameter
-    ).first()
+    ).first())
 
     if not config:
         raise HTTPException(
@@ -369,6 +533,13 @@ def update_configuration(
 
     db.commit()
     db.refresh(config)
+    coalescer.invalidate(f"configuration:{parameter}")
+
+    # Profiler toggles take effect immediately in this worker (others pick them up on refresh)
+    if parameter == profiling.PROFILING_PARAMETER:
+        profiling.apply_settings(enabled=config.value)
+    elif parameter == profiling.THRESHOLD_PARAMETER:
+        profiling.apply_settings(threshold_ms=config.value)
 
     return {
         "message": f"Configuration parameter '{parameter}' updated successfully",
@@ -415,6 +586,7 @@ def create_configuration(
     db.add(new_config)
     db.commit()
     db.refresh(new_config)
+    coalescer.invalidate(f"configuration:{req.parameter}")
 
     return {
         "message": f"Configuration parameter '{req.parameter}' created successfully",
@@ -422,6 +594,34 @@ def create_configuration(
         "value": new_config.value
     }
 
+@router.get("/clients")
+def get_client_usage(api_key: str = Depends(get_api_key)):
+    """
+    Get the number of authenticated requests served per API client by this worker.
+
+    Returns:
+        JSON object mapping client name to request count
+    """
+    return api_keys.usage_snapshot()
+
+@router.get("/profiling")
+def get_query_profile(
+    limit: int = Query(50, gt=0, description="Number of statements to return"),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get per-statement timings recorded by this worker since the last reset.
+
+    Returns:
+        JSON object with profiler settings and statements ordered by total time
+    """
+    return profiling.snapshot(limit)
+
+@router.delete("/profiling")
+def reset_query_profile(api_key: str = Depends(get_api_key)):
+    profiling.reset()
+    return {"message": "Query profile reset"}
+
 @router.get("/test-data")
 def get_test_execution_column(
     column: str = Query(..., description="Column name to retrieve"),
@@ -1,6 +1,6 @@
 # schemas.py
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
@@ -19,6 +19,7 @@ class RegisterRequest(BaseModel):
     container_name: str
     execution_type: str  # "distributed", "client-server", etc.
     workers: List[str]  # List of server names running the test
+    worker_factors: Optional[List[Decimal]] = None  # factor allocated to each worker, same order as workers (default: even split)
     tool: str
     script_version: str
 
@@ -27,6 +28,64 @@ class CompleteRequest(BaseModel):
     run_id: int
     status: str  # "success", "failure", "cancelled"
 
+class HeartbeatRequest(BaseModel):
+    run_id: int
+
+class TelemetryRequest(BaseModel):
+    servername: str
+    cpu_percent: float
+    load1: float
+    mem_free_mb: float
+    mem_total_mb: float
+    net_rx_kbps: float = 0
+    net_tx_kbps: float = 0
+
+class AgentJobSpec(BaseModel):
+    image: str  # must be allowed by the agent (AGENT_IMAGES)
+    container_name: str
+    workdir: Optional[str] = None  # host directory mounted at /opt/jmeter/staging
+    args: List[str] = []
+    env: Dict[str, str] = {}
+    ports: List[int] = []  # published as host:container on the same port
+    detach: bool = False  # return as soon as the container started (e.g. jmeter-server)
+    archive: Optional[str] = None  # directory in workdir zipped to <archive>.zip after the run
+
+class AgentJobRequest(BaseModel):
+    run_id: int
+    servers: List[str]  # one job per server
+    action: str  # "start", "stop"
+    spec: AgentJobSpec
+
+class AgentJobStatusRequest(BaseModel):
+    status: str  # "running", "succeeded", "failed"
+    exit_code: Optional[int] = None
+    log: Optional[str] = None  # output since the previous update
+
+class AgentJobSchema(BaseModel):
+    id: UUID
+    run_id: int
+    servername: str
+    action: str
+    spec: dict
+    status: str
+    exit_code: Optional[int]
+    log_tail: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class ExecutionEventSchema(BaseModel):
+    id: int  # offset, pass the last one received as 'after'
+    event_type: str  # "registered", "completed", "cancelled", "lost", "location_status"
+    run_id: Optional[int]
+    payload: dict
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
 class TestExecutionSchema(BaseModel):
     id: UUID
     run_id: int
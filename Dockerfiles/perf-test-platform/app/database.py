@@ -1,38 +1,122 @@
 # database.py
-import os, urllib.parse, hvac
-from sqlalchemy import create_engine
+import os, itertools, logging, threading, time, urllib.parse, psycopg2
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import profiling
+from vault import provider
 
-# Set your Vault details (in production, pull these from environment variables)
-vault_url = os.environ.get("VAULT_URL")
-vault_token = os.environ.get("VAULT_TOKEN")
+logger = logging.getLogger("registry.database")
 
-# Initialize Vault client
-client = hvac.Client(url=vault_url, token=vault_token)
+# Read replicas used by the read-only analytics endpoints (get_read_db): comma-separated host[:port],
+# with the same credentials and database name as the primary
+DB_REPLICA_SERVERS = [s.strip() for s in os.environ.get("DB_REPLICA_SERVERS", "").split(",") if s.strip()]
+# Replicas replaying more than this behind the primary are skipped until they catch up
+MAX_REPLICA_LAG_SECONDS = float(os.environ.get("MAX_REPLICA_LAG_SECONDS", "10"))
+REPLICA_CHECK_SECONDS = int(os.environ.get("REPLICA_CHECK_SECONDS", "5"))
 
-# Retrieve secret from Vault (update the path to match your setup)
-secret_response = client.secrets.kv.v1.read_secret(
-    path='/data/performance-platform/application',
-    mount_point='devplatforms'
+# 0 when the replica has replayed everything it received, otherwise the age of the last replayed transaction
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
 )
 
-# Extract credentials
-db_username = secret_response['data']['data']['db_app_user']
-db_password = secret_response['data']['data']['db_app_password']
-db_host = secret_response['data']['data'].get('db_server')
-db_name = secret_response['data']['data'].get('db_name')
-db_server_port = secret_response['data']['data'].get('db_server_port')
+def connect(server=None):
+    # Credentials are read from the cached secret on every new pool connection,
+    # so Vault is only contacted on first use and rotated passwords apply without a restart
+    host, port = provider.get('db_server'), provider.get('db_server_port')
+    if server:
+        host, _, replica_port = server.partition(':')
+        port = replica_port or port
+    return psycopg2.connect(
+        user=provider['db_app_user'],
+        password=provider['db_app_password'],
+        host=host,
+        dbname=provider.get('db_name'),
+        port=port
+    )
 
-# Build your DB URL
-SQLALCHEMY_DATABASE_URL = f"postgresql://{db_username}:{db_password}@{db_host}:{db_server_port}/{db_name}"
+SQLALCHEMY_DATABASE_URL = "postgresql+psycopg2://"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, creator=connect)
+profiling.attach(engine)  # Opt-in, toggled through the configurations table
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+class ReplicaRouter:
+    """
+    Hands out sessions on the read replicas, round-robin.
+
+    A daemon thread measures the replay lag of every replica each
+    REPLICA_CHECK_SECONDS; replicas that are unreachable or lag more than
+    max_lag are skipped, and sessions fall back to the primary when no
+    replica is usable (or none is configured).
+    """
+
+    def __init__(self, servers=DB_REPLICA_SERVERS, max_lag=MAX_REPLICA_LAG_SECONDS):
+        self.max_lag = max_lag
+        self.lag = {}  # server -> seconds behind the primary, None when the check failed
+        self._sessions = {}
+        self._engines = {}
+        for server in servers:
+            replica_engine = create_engine(SQLALCHEMY_DATABASE_URL, creator=lambda server=server: connect(server), pool_pre_ping=True)
+            profiling.attach(replica_engine)
+            self._engines[server] = replica_engine
+            self._sessions[server] = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+        self._turn = itertools.count()
+
+    def usable(self):
+        return [s for s in self._engines if self.lag.get(s) is not None and self.lag[s] <= self.max_lag]
+
+    def serves(self, db):
+        # True when the session reads from a replica rather than the primary
+        return db.get_bind() is not engine
+
+    def session(self):
+        servers = self.usable()
+        if not servers:
+            return SessionLocal()
+        return self._sessions[servers[next(self._turn) % len(servers)]]()
+
+    def check(self):
+        for server, replica_engine in self._engines.items():
+            try:
+                with replica_engine.connect() as conn:
+                    lag = float(conn.execute(REPLICA_LAG_QUERY).scalar())
+            except Exception as e:
+                if server not in self.lag or self.lag[server] is not None:
+                    logger.warning(f"Replica {server} unavailable, reading from the primary: {e}")
+                lag = None
+            if lag is not None and lag > self.max_lag and (self.lag.get(server) or 0) <= self.max_lag:
+                logger.warning(f"Replica {server} is {lag:.1f}s behind the primary, skipping it")
+            self.lag[server] = lag
+
+    def _check_loop(self, interval):
+        while True:
+            self.check()
+            time.sleep(interval)
+
+    def start(self, interval=REPLICA_CHECK_SECONDS):
+        if self._engines:
+            threading.Thread(target=self._check_loop, args=(interval,), daemon=True).start()
+
+
+replicas = ReplicaRouter()
+
 def get_db():
     db = SessionLocal()
+    profiling.refresh_settings(db)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db():
+    # Read-only endpoints that tolerate MAX_REPLICA_LAG_SECONDS of staleness. Writes and reads
+    # that must see the caller's own writes (e.g. /test-data right after /register) use get_db
+    db = replicas.session()
+    profiling.refresh_settings(db)
     try:
         yield db
     finally:
@@ -0,0 +1,151 @@
+# events.py
+import os, logging, select, threading, time
+from datetime import datetime
+from sqlalchemy import text
+import models
+from database import connect
+
+logger = logging.getLogger("registry.events")
+
+CHANNEL = "execution_events"
+# Held while an event is inserted and until its transaction commits, so offsets become visible in
+# order and a consumer reading 'after=<offset>' never skips an event committed late. It has to be
+# global (a per-run key would let offsets of different runs commit out of order), so writers take
+# it first, before locking any row (see lock)
+ADVISORY_LOCK_KEY = 7461001
+
+# Longest time /events holds a request open, and how often it re-reads the table meanwhile
+# (covers notifications missed while the listener reconnects)
+WAIT_SECONDS = int(os.environ.get("EVENTS_WAIT_SECONDS", "25"))
+RECHECK_SECONDS = 5.0
+LISTEN_RETRY_SECONDS = 5
+
+
+def lock(db):
+    """
+    Take the event lock for the rest of the caller's transaction. Transactions that
+    record an event call this before reading or changing the rows the event is about,
+    so every writer takes the event lock and row locks in the same order.
+    """
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+
+def record(db, event_type, run_id=None, **payload):
+    """
+    Append an event and publish its offset on the execution_events channel.
+    Runs in the caller's transaction, which must have called lock() before touching
+    any row; the caller commits (NOTIFY is delivered on commit).
+    """
+    lock(db)  # no-op when the transaction already holds it
+    event = models.ExecutionEvent(
+        event_type=event_type,
+        run_id=run_id,
+        payload=payload,
+        created_at=datetime.utcnow()
+    )
+    db.add(event)
+    db.flush()
+    db.execute(text("SELECT pg_notify(:channel, :offset)"), {"channel": CHANNEL, "offset": str(event.id)})
+    return event
+
+
+def record_execution(db, test):
+    """
+    Record the event matching the current status of an execution.
+    """
+    if test.status == "running":
+        event_type = "registered"
+    elif test.status == "cancelled":
+        event_type = "cancelled"
+    elif test.status == "lost":
+        event_type = "lost"
+    else:
+        event_type = "completed"
+    return record(
+        db, event_type, test.run_id,
+        status=test.status,
+        location=test.location,
+        environment=test.environment,
+        lac=test.lac,
+        test=test.test,
+        type=test.type,
+        factor=float(test.factor),
+        workers=test.workers,
+        start_time=test.start_time.isoformat(),
+        end_time=test.end_time.isoformat() if test.end_time else None
+    )
+
+
+class EventNotifier:
+    """
+    Latest offset announced on the execution_events channel, kept by a daemon
+    thread LISTENing on its own connection. /events waits on it instead of
+    polling the table.
+    """
+
+    def __init__(self):
+        self.latest = 0
+        self._condition = threading.Condition()
+
+    def publish(self, offset):
+        with self._condition:
+            if offset > self.latest:
+                self.latest = offset
+                self._condition.notify_all()
+
+    def wait(self, after, timeout):
+        """
+        Block until an offset greater than 'after' is announced or timeout elapses.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.latest > after, timeout)
+
+    def _listen(self):
+        conn = connect()
+        try:
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CHANNEL}")
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self.publish(int(conn.notifies.pop(0).payload))
+        finally:
+            conn.close()
+
+    def _listen_loop(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"Event listener failed, reconnecting in {LISTEN_RETRY_SECONDS}s: {e}")
+            time.sleep(LISTEN_RETRY_SECONDS)
+
+
+notifier = EventNotifier()
+
+
+def start():
+    threading.Thread(target=notifier._listen_loop, daemon=True).start()
+
+
+def read(db, after, limit):
+    return (
+        db.query(models.ExecutionEvent)
+        .filter(models.ExecutionEvent.id > after)
+        .order_by(models.ExecutionEvent.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def wait_for_events(db, after, limit, wait):
+    deadline = time.monotonic() + wait
+    while True:
+        events = read(db, after, limit)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        db.rollback()  # don't keep a transaction open while waiting
+        notifier.wait(after, min(remaining, RECHECK_SECONDS))
@@ -0,0 +1,21 @@
+# gunicorn.conf.py
+#
+# Production server settings used by entrypoint.sh. The app is imported once in the master
+# (preload_app) and the forked workers share its modules, routes and pydantic models
+# copy-on-write, so a worker starts without re-importing anything.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Rolling restarts (SIGHUP) let in-flight requests finish; kept above the 60s maximum wait of the
+# /agent/poll and /events long polls so a waiting poll is not cut off
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "65"))
+# Runners and runner agents reuse their connections between polls
+keepalive = 75
+
+
+def when_ready(server):
+    # Build the OpenAPI schema in the master so workers inherit it instead of each generating it
+    server.app.wsgi().openapi()
@@ -1,18 +1,30 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Depends, Response, Query
+import os
+import anyio.to_thread
+from fastapi import FastAPI, HTTPException, Depends, Response, Query, Request
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, text
 import models
-from database import engine, get_db
+from database import engine, get_db, replicas
 from datetime import datetime
 import uuid
-from api.v1 import endpoints as v1_endpoints
 from api.v2 import endpoints as v2_endpoints
 from api.v3 import endpoints as v3_endpoints
-from security import get_api_key  
+from security import get_api_key, api_keys
+from throttling import rate_limit
+import profiling
+import prestart
+import events
+import reaper
+import telemetry
 
-models.Base.metadata.create_all(bind=engine)
+# Threads serving sync endpoints per worker process (AnyIO's default is 40)
+THREADPOOL_SIZE = int(os.environ.get("THREADPOOL_SIZE", "100"))
+
+# In production entrypoint.sh runs prestart.py once instead of every worker doing it here
+if prestart.SCHEMA_SETUP == "import":
+    prestart.prepare_database(engine)
 
 app = FastAPI(
     title="Performance Test Execution Registry",
@@ -20,9 +32,61 @@ app = FastAPI(
     version="2.0.0"
 )
 
+@app.on_event("startup")
+async def size_threadpool():
+    # Sync endpoints run in AnyIO's thread pool, and every waiting /events or /agent/poll long poll
+    # holds one of its threads for up to 'wait' seconds
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Releases the capacity of executions whose runner stopped sending heartbeats
+    reaper.start()
+    # Downsamples worker telemetry into worker_metrics
+    telemetry.start()
+    # Wakes /events long-polls on NOTIFY execution_events
+    events.start()
+    # Replay lag of the read replicas used by get_read_db
+    replicas.start()
+
+def check_ready():
+    # Loads the secrets and the API key index on first use and checks a pooled connection
+    api_keys.ensure_loaded()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+@app.on_event("startup")
+def warm_up():
+    # Pay the first-use costs before traffic arrives; /ready retries if the database is not up yet
+    try:
+        check_ready()
+    except Exception:
+        pass
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """
+    Readiness probe: 200 once this worker has its secrets and API keys loaded and the database answers.
+    """
+    try:
+        check_ready()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Not ready: {e}")
+    return {"status": "ready"}
+
+# Tag every statement issued while serving a request with its endpoint (used by profiling.py)
+@app.middleware("http")
+async def track_endpoint(request: Request, call_next):
+    token = profiling.current_scope.set(request.scope)
+    try:
+        return await call_next(request)
+    finally:
+        profiling.current_scope.reset(token)
+
 # Include version-specific routers
-app.include_router( v3_endpoints.router, prefix="/v3", tags=["v3"], dependencies=[Depends(get_api_key)])
+app.include_router( v3_endpoints.router, prefix="/v3", tags=["v3"], dependencies=[Depends(get_api_key), Depends(rate_limit)])
 app.include_router( v2_endpoints.router, prefix="/v2", tags=["v2"])
+# v1 is retired (not imported): from api.v1 import endpoints as v1_endpoints
 #app.include_router( v1_endpoints.router, prefix="/v1", tags=["v1"])
     
 @app.get("/")
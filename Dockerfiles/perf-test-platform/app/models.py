@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, String, DateTime, Integer, Numeric
+from sqlalchemy import Column, String, DateTime, Date, Integer, BigInteger, Numeric, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 import uuid
@@ -8,6 +8,8 @@ from database import Base
 
 class TestExecution(Base):
     __tablename__ = "test_executions"
+    # Monthly range partitions by start_time, managed by partitions.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (start_time)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     run_id = Column(Integer, nullable=False)
@@ -19,8 +21,9 @@ class TestExecution(Base):
     environment = Column(String(255), nullable=False)
     triggered_by = Column(String(255), nullable=False)
     status = Column(String(50), nullable=False)
-    start_time = Column(DateTime(timezone=True), nullable=False)
+    start_time = Column(DateTime(timezone=True), primary_key=True)  # partition key, part of the primary key
     end_time = Column(DateTime(timezone=True), nullable=True)
+    last_heartbeat = Column(DateTime(timezone=True), nullable=True)  # last /heartbeat from the runner
     factor = Column(Numeric(3,2), nullable=False)
     dashboard_url = Column(String(255), nullable=True)
     location = Column(String(255), nullable=False)
@@ -30,6 +33,24 @@ class TestExecution(Base):
     tool = Column(String(50), nullable=False)
     script_version = Column(String(8), nullable=False)
 
+class ExecutionWorker(Base):
+    __tablename__ = "execution_workers"
+    __table_args__ = (
+        # Capacity aggregates (/workers, /locations) only read allocations of running executions
+        Index("ix_execution_workers_running", "location", "environment", "servername",
+              postgresql_include=["factor"], postgresql_where=text("end_time IS NULL")),
+        Index("ix_execution_workers_run_id", "run_id")
+    )
+
+    execution_id = Column(UUID(as_uuid=True), primary_key=True)  # test_executions.id
+    servername = Column(String(255), primary_key=True)
+    run_id = Column(Integer, nullable=False)
+    location = Column(String(255), nullable=False)
+    environment = Column(String(255), nullable=False)
+    factor = Column(Numeric, nullable=False)  # share of the execution's factor allocated to this worker
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    end_time = Column(DateTime(timezone=True), nullable=True)  # NULL while the execution is running
+
 class Location(Base):
     __tablename__ = "locations"
 
@@ -47,3 +68,65 @@ class Configuration(Base):
     parameter = Column(String, nullable=False, unique=True, primary_key=True)
     value = Column(String, nullable=False)
 
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    client = Column(String(255), primary_key=True)  # runner or team owning the key
+    key_hash = Column(String(64), nullable=False, unique=True)  # SHA-256 hex digest of the key
+    status = Column(String(10), nullable=False)  # "active", "revoked"
+
+class ExecutionDailyRollup(Base):
+    __tablename__ = "execution_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    stream = Column(String(255), primary_key=True)
+    lac = Column(String(255), primary_key=True)
+    type = Column(String(255), primary_key=True)
+    location = Column(String(255), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    script_version = Column(String(8), primary_key=True)
+    executions = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(Numeric, nullable=False, default=0)  # sum over finished executions
+    factor_hours = Column(Numeric, nullable=False, default=0)  # sum of factor * duration in hours
+
+class WorkerMetric(Base):
+    __tablename__ = "worker_metrics"
+
+    servername = Column(String(255), primary_key=True)
+    bucket_time = Column(DateTime(timezone=True), primary_key=True)  # minute the samples were flushed
+    samples = Column(Integer, nullable=False)
+    cpu_percent = Column(Numeric, nullable=False)
+    load1 = Column(Numeric, nullable=False)
+    mem_free_mb = Column(Numeric, nullable=False)
+    mem_total_mb = Column(Numeric, nullable=False)
+    net_rx_kbps = Column(Numeric, nullable=False)
+    net_tx_kbps = Column(Numeric, nullable=False)
+
+class AgentJob(Base):
+    __tablename__ = "agent_jobs"
+    __table_args__ = (
+        Index("ix_agent_jobs_servername_status", "servername", "status"),  # /agent/poll
+        Index("ix_agent_jobs_run_id", "run_id")
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    run_id = Column(Integer, nullable=False)
+    servername = Column(String(255), nullable=False)  # worker whose runner agent executes the job
+    action = Column(String(20), nullable=False)  # "start", "stop"
+    spec = Column(JSONB, nullable=False)  # container to start/stop, see schemas.AgentJobSpec
+    status = Column(String(20), nullable=False)  # "queued", "claimed", "running", "succeeded", "failed"
+    exit_code = Column(Integer, nullable=True)
+    log_tail = Column(Text, nullable=True)  # last output of the container
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+class ExecutionEvent(Base):
+    __tablename__ = "execution_events"
+    # Append-only; id is the offset consumers of /events resume from
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    event_type = Column(String(30), nullable=False)  # "registered", "completed", "cancelled", "lost", "location_status"
+    run_id = Column(Integer, nullable=True)  # not set for location_status
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,155 @@
+#!/usr/bin/python
+# partitions.py
+#
+# Monthly range partitions of test_executions (by start_time) and archiving of old ones.
+# The reaper thread (reaper.py) runs maintain() every PARTITION_MAINTENANCE_SECONDS.
+#
+# Usage: python3 partitions.py maintain [retention_months] [parquet_dir]
+
+import os, re, sys, logging
+from datetime import date
+from sqlalchemy import text
+
+logger = logging.getLogger("registry.partitions")
+
+PARENT_TABLE = "test_executions"
+ARCHIVE_TABLE = "test_executions_archive"
+
+MONTHS_AHEAD = 2
+RETENTION_MONTHS = int(os.environ.get("RETENTION_MONTHS", "12"))
+PARTITION_MAINTENANCE_SECONDS = int(os.environ.get("PARTITION_MAINTENANCE_SECONDS", "3600"))
+# Periodic maintenance also archives partitions older than RETENTION_MONTHS (off: only creates partitions)
+ARCHIVE_PARTITIONS = os.environ.get("ARCHIVE_PARTITIONS", "false").lower() == "true"
+# Serializes partition DDL between the registry workers and the maintain command
+ADVISORY_LOCK_KEY = 7461002
+
+
+def _month_start(day, offset=0):
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _create_partition(conn, start):
+    """
+    Create the partition for the month starting at start. Rows of that month already
+    in the default partition (written while no partition covered it) block a plain
+    CREATE ... PARTITION OF, so the default partition is detached while they are moved.
+    """
+    name, end = partition_name(start), _month_start(start, 1)
+    bounds = {"start": start, "end": end}
+    default = f"{PARENT_TABLE}_default"
+    stranded = conn.execute(text(
+        f"SELECT count(*) FROM {default} WHERE start_time >= :start AND start_time < :end"
+    ), bounds).scalar()
+    if stranded:
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {default}"))
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    if stranded:
+        conn.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE start_time >= :start AND start_time < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {default} DEFAULT"))
+        logger.info(f"Moved {stranded} rows from {default} to {name}")
+
+
+def ensure_partitions(engine, months_ahead=MONTHS_AHEAD):
+    """
+    Create the partitions for the current month and the next months_ahead months,
+    plus the default partition and the archive table.
+    Does nothing when test_executions is not partitioned.
+    """
+    with engine.begin() as conn:
+        partitioned = conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table"
+        ), {"table": PARENT_TABLE}).first()
+        if not partitioned:
+            return
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {PARENT_TABLE}_default PARTITION OF {PARENT_TABLE} DEFAULT"))
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+        this_month = _month_start(date.today())
+        for offset in range(months_ahead + 1):
+            start = _month_start(this_month, offset)
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": partition_name(start)}).scalar() is None:
+                _create_partition(conn, start)
+
+
+def _write_parquet(conn, table, parquet_dir):
+    # Optional: pyarrow is only needed when archiving to Parquet files
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = [dict(row._mapping) for row in conn.execute(text(f"SELECT * FROM {table}"))]
+    for row in rows:
+        row["id"] = str(row["id"])
+    path = os.path.join(parquet_dir, f"{table}.parquet")
+    pq.write_table(pa.Table.from_pylist(rows), path, compression="zstd")
+    return path
+
+
+def archive_partitions(engine, retention_months=RETENTION_MONTHS, parquet_dir=None):
+    """
+    Detach the monthly partitions older than retention_months, move their rows
+    to test_executions_archive (or a zstd Parquet file when parquet_dir is
+    given) and drop them.
+
+    Returns:
+        list of archived partition names
+    """
+    cutoff = _month_start(date.today(), -retention_months)
+    archived = []
+    with engine.begin() as conn:
+        partitions = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table ORDER BY c.relname"
+        ), {"table": PARENT_TABLE}).scalars().all()
+
+    for name in partitions:
+        match = re.fullmatch(rf"{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})", name)
+        if not match:
+            continue  # e.g. the default partition
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if month >= cutoff:
+            continue
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            if parquet_dir:
+                path = _write_parquet(conn, name, parquet_dir)
+                logger.info(f"Archived {name} to {path}")
+            else:
+                conn.execute(text(f"INSERT INTO {ARCHIVE_TABLE} SELECT * FROM {name}"))
+                logger.info(f"Archived {name} to {ARCHIVE_TABLE}")
+            conn.execute(text(f"DROP TABLE {name}"))
+        archived.append(name)
+    return archived
+
+
+def maintain(engine, retention_months=RETENTION_MONTHS, parquet_dir=None, archive=True):
+    ensure_partitions(engine)
+    if archive:
+        archive_partitions(engine, retention_months, parquet_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] != "maintain":
+        print("Usage: python3 partitions.py maintain [retention_months] [parquet_dir]")
+        sys.exit(1)
+
+    from database import engine
+    maintain(
+        engine,
+        int(sys.argv[2]) if len(sys.argv) > 2 else RETENTION_MONTHS,
+        sys.argv[3] if len(sys.argv) > 3 else None
+    )
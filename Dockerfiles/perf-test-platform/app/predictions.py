@@ -0,0 +1,150 @@
+# predictions.py
+import os, threading, time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import models
+import allocations
+
+# Most recent successful durations kept per (lac, test, type)
+HISTORY_SIZE = int(os.environ.get("PREDICTION_HISTORY_SIZE", "50"))
+# Other API workers only see /complete calls they served, so cached keys are reloaded after this long
+CACHE_TTL_SECONDS = int(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "600"))
+
+
+def _percentile(sorted_values, pct):
+    index = (len(sorted_values) - 1) * pct / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def _naive_utc(value):
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class DurationModel:
+    """
+    Per-test duration history with robust statistics (median, MAD, p90).
+
+    Histories are loaded from test_executions on first use and extended
+    in place by /complete, so predictions never rescan the table.
+    """
+
+    def __init__(self, size=HISTORY_SIZE, ttl=CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self._history = {}
+        self._lock = threading.Lock()
+
+    def _load(self, db, key):
+        lac, test, type_ = key
+        rows = (
+            db.query(models.TestExecution.start_time, models.TestExecution.end_time)
+            .filter(models.TestExecution.lac == lac)
+            .filter(models.TestExecution.test == test)
+            .filter(models.TestExecution.type == type_)
+            .filter(models.TestExecution.status == "success")
+            .filter(models.TestExecution.end_time.isnot(None))
+            .order_by(models.TestExecution.start_time.desc())
+            .limit(self.size)
+            .all()
+        )
+        durations = deque(
+            ((row.end_time - row.start_time).total_seconds() for row in reversed(rows)),
+            maxlen=self.size
+        )
+        return {"durations": durations, "loaded_at": time.monotonic()}
+
+    def _entry(self, db, key):
+        entry = self._history.get(key)
+        if entry is None or time.monotonic() - entry["loaded_at"] > self.ttl:
+            entry = self._load(db, key)
+            with self._lock:
+                self._history[key] = entry
+        return entry
+
+    def record(self, test):
+        """
+        Add a finished execution to its cached history (no-op if the key is not cached).
+        """
+        if test.status != "success" or test.end_time is None:
+            return
+        entry = self._history.get((test.lac, test.test, test.type))
+        if entry is not None:
+            duration = (_naive_utc(test.end_time) - _naive_utc(test.start_time)).total_seconds()
+            with self._lock:
+                entry["durations"].append(duration)
+
+    def predict(self, db, lac, test, type_):
+        """
+        Returns:
+            dict with sample count and median/MAD/p90 duration in seconds
+            (None values when there is no history)
+        """
+        entry = self._entry(db, (lac, test, type_))
+        with self._lock:
+            durations = sorted(entry["durations"])
+        if not durations:
+            return {"samples": 0, "median_seconds": None, "mad_seconds": None, "p90_seconds": None}
+        median = _percentile(durations, 50)
+        mad = _percentile(sorted(abs(d - median) for d in durations), 50)
+        return {
+            "samples": len(durations),
+            "median_seconds": round(median, 1),
+            "mad_seconds": round(mad, 1),
+            "p90_seconds": round(_percentile(durations, 90), 1)
+        }
+
+
+durations = DurationModel()
+
+
+def forecast(db, location, environment, hours, step_minutes, running):
+    """
+    Free factor per worker server at each step over the next hours, assuming
+    each running execution ends at start_time + its predicted p90 duration.
+    Executions without history are assumed to run past the horizon.
+
+    Args:
+        running: running TestExecution rows for the location/environment
+    """
+    now = datetime.utcnow()
+    horizon = now + timedelta(hours=hours)
+    servers = (
+        db.query(models.Location.servername, models.Location.factor)
+        .filter(models.Location.location == location)
+        .filter(models.Location.environment == environment)
+        .filter(models.Location.type == "worker")
+        .filter(models.Location.status == "up")
+        .all()
+    )
+
+    # (servername, share of factor, expected end) for every running execution
+    allocated = allocations.shares(db, [test.id for test in running])
+    loads = []
+    for test in running:
+        prediction = durations.predict(db, test.lac, test.test, test.type)
+        expected_end = horizon
+        if prediction["p90_seconds"] is not None:
+            expected_end = _naive_utc(test.start_time) + timedelta(seconds=prediction["p90_seconds"])
+            # Overdue runs still hold their share now; assume they finish within the next step
+            expected_end = max(expected_end, now + timedelta(minutes=step_minutes))
+        for worker, share in allocated.get(test.id, []):
+            loads.append((worker, share, expected_end))
+
+    steps = []
+    at = now
+    while at <= horizon:
+        free = {row.servername: float(row.factor) for row in servers}
+        for worker, share, expected_end in loads:
+            if worker in free and expected_end > at:
+                free[worker] -= share
+        steps.append({
+            "time": at.isoformat(),
+            "free_factor": {name: round(value, 2) for name, value in free.items()},
+            "total_free_factor": round(sum(max(0.0, v) for v in free.values()), 2)
+        })
+        at += timedelta(minutes=step_minutes)
+    return steps
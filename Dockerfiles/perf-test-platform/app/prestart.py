@@ -0,0 +1,33 @@
+#!/usr/bin/python
+# prestart.py
+#
+# Database preparation (schema creation and partition checks) run once before the API workers start.
+# In production entrypoint.sh runs it before forking the workers and sets SCHEMA_SETUP=prestart,
+# so the workers skip it at import.
+#
+# Usage: python3 prestart.py
+
+import os, sys, logging
+import models
+import partitions
+
+logger = logging.getLogger("registry.prestart")
+
+# "import": every process importing main.py prepares the database (development), "prestart": this script did it
+SCHEMA_SETUP = os.environ.get("SCHEMA_SETUP", "import")
+
+
+def prepare_database(engine):
+    models.Base.metadata.create_all(bind=engine)
+    partitions.ensure_partitions(engine)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from database import engine
+    try:
+        prepare_database(engine)
+    except Exception as e:
+        logger.error(f"Database preparation failed: {e}")
+        sys.exit(1)
+    logger.info("Database schema and partitions are up to date")
@@ -0,0 +1,171 @@
+# profiling.py
+import logging, threading, time
+from contextvars import ContextVar
+from sqlalchemy import event, text
+
+logger = logging.getLogger("registry.profiling")
+
+# Configuration parameters (configurations table) controlling the profiler at runtime
+PROFILING_PARAMETER = "query_profiling"            # "on" / "off"
+THRESHOLD_PARAMETER = "slow_query_threshold_ms"    # statements above this are logged with EXPLAIN
+CONFIG_REFRESH_SECONDS = 30
+
+# ASGI scope of the request issuing the current statement (set per request by the middleware in main.py)
+current_scope: ContextVar[dict] = ContextVar("current_scope", default=None)
+
+_lock = threading.Lock()
+_settings = {"enabled": False, "threshold_ms": 500.0, "loaded_at": 0.0}
+_stats = {}
+
+
+def is_enabled():
+    return _settings["enabled"]
+
+
+def apply_settings(enabled=None, threshold_ms=None):
+    """
+    Apply profiler settings without waiting for the next configuration refresh.
+
+    Args:
+        enabled: "on"/"off" (or bool) to toggle statement recording
+        threshold_ms: slow-query threshold in milliseconds
+    """
+    if enabled is not None:
+        _settings["enabled"] = enabled if isinstance(enabled, bool) else str(enabled).lower() in ("on", "true", "1")
+    if threshold_ms is not None:
+        try:
+            _settings["threshold_ms"] = float(threshold_ms)
+        except ValueError:
+            logger.warning(f"Invalid {THRESHOLD_PARAMETER} value '{threshold_ms}', keeping {_settings['threshold_ms']}")
+
+
+def refresh_settings(db):
+    """
+    Reload the profiler toggles from the configurations table, at most once
+    every CONFIG_REFRESH_SECONDS per worker process.
+
+    Args:
+        db: SQLAlchemy session used for the lookup
+    """
+    if time.monotonic() - _settings["loaded_at"] < CONFIG_REFRESH_SECONDS:
+        return
+    _settings["loaded_at"] = time.monotonic()
+    try:
+        values = dict(db.execute(
+            text("SELECT parameter, value FROM configurations WHERE parameter IN (:enabled, :threshold)"),
+            {"enabled": PROFILING_PARAMETER, "threshold": THRESHOLD_PARAMETER}
+        ).fetchall())
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not read profiling configuration: {e}")
+        return
+    apply_settings(values.get(PROFILING_PARAMETER), values.get(THRESHOLD_PARAMETER))
+
+
+def current_endpoint():
+    """
+    Method and route template (e.g. "GET /v3/status/{run_id}") of the current request,
+    so requests for different path parameters share one entry.
+    """
+    scope = current_scope.get()
+    if scope is None:
+        return "-"
+    route = scope.get("route")  # set by the router once the request is matched
+    return f"{scope.get('method', '')} {route.path if route is not None else '<unmatched>'}"
+
+
+def _explain(cursor, statement, parameters):
+    # Plain EXPLAIN (no ANALYZE) so the statement is planned but never executed twice. It runs in a
+    # savepoint of the request's transaction: a failing EXPLAIN is rolled back to it instead of
+    # aborting the transaction the request still uses
+    dbapi_connection = cursor.connection
+    savepoint = not dbapi_connection.autocommit
+    explain_cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            explain_cursor.execute("SAVEPOINT profiling_explain")
+        try:
+            explain_cursor.execute("EXPLAIN " + statement, parameters)
+            plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception as e:
+            if savepoint:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT profiling_explain")
+            plan = f"EXPLAIN failed: {e}"
+        if savepoint:
+            explain_cursor.execute("RELEASE SAVEPOINT profiling_explain")
+        return plan
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        explain_cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, which is discarded if the statement fails
+    if _settings["enabled"]:
+        context._profiling_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_profiling_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    rows = cursor.rowcount if cursor.rowcount is not None else -1
+    endpoint = current_endpoint()
+
+    with _lock:
+        entry = _stats.setdefault((endpoint, statement), {
+            "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0
+        })
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["rows"] += max(rows, 0)
+
+    if elapsed_ms >= _settings["threshold_ms"]:
+        plan = ""
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            plan = _explain(cursor, statement, parameters)
+        logger.warning(
+            f"Slow query ({elapsed_ms:.1f} ms, {rows} rows) from {endpoint}:\n{statement}\n{plan}"
+        )
+
+
+def attach(engine):
+    """
+    Register the profiling hooks on an engine. Recording stays off until
+    'query_profiling' is set to 'on' in the configurations table.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def snapshot(limit=50):
+    """
+    Return the recorded statements ordered by total time spent, slowest first.
+    """
+    with _lock:
+        items = list(_stats.items())
+    items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+    return {
+        "enabled": _settings["enabled"],
+        "threshold_ms": _settings["threshold_ms"],
+        "statements": [
+            {
+                "endpoint": endpoint,
+                "statement": statement,
+                "calls": data["calls"],
+                "total_ms": round(data["total_ms"], 3),
+                "avg_ms": round(data["total_ms"] / data["calls"], 3),
+                "max_ms": round(data["max_ms"], 3),
+                "rows": data["rows"]
+            }
+            for (endpoint, statement), data in items[:limit]
+        ]
+    }
+
+
+def reset():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,89 @@
+# reaper.py
+import os, logging, threading, time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+import models
+import partitions
+import rollups
+import events
+import allocations
+import agents
+from database import SessionLocal, engine
+from throttling import coalescer
+
+logger = logging.getLogger("registry.reaper")
+
+# A running execution is 'lost' when its runner has not sent /heartbeat for this long
+HEARTBEAT_TIMEOUT_SECONDS = int(os.environ.get("HEARTBEAT_TIMEOUT_SECONDS", "600"))
+# Fallback for runners that never sent a heartbeat (older scripts)
+STALE_RUN_MAX_HOURS = int(os.environ.get("STALE_RUN_MAX_HOURS", "48"))
+REAPER_INTERVAL_SECONDS = int(os.environ.get("REAPER_INTERVAL_SECONDS", "60"))
+
+
+def reap_stale_executions(db):
+    """
+    Mark running executions without a recent heartbeat as 'lost', releasing
+    their factor in /workers and /locations.
+
+    Rows are locked with SKIP LOCKED, so reapers in several workers never
+    process the same execution twice. The event lock is taken before the row
+    locks, in the same order as /complete.
+
+    Returns:
+        list of reaped run_ids
+    """
+    now = datetime.utcnow()
+    candidates = (
+        db.query(models.TestExecution)
+        .filter(models.TestExecution.status == "running")
+        .filter(or_(
+            and_(models.TestExecution.last_heartbeat.isnot(None),
+                 models.TestExecution.last_heartbeat < now - timedelta(seconds=HEARTBEAT_TIMEOUT_SECONDS)),
+            and_(models.TestExecution.last_heartbeat.is_(None),
+                 models.TestExecution.start_time < now - timedelta(hours=STALE_RUN_MAX_HOURS))
+        ))
+    )
+    if candidates.with_entities(models.TestExecution.id).first() is None:
+        db.rollback()
+        return []
+    events.lock(db)
+    stale = candidates.with_for_update(skip_locked=True).all()
+    for test in stale:
+        test.status = "lost"
+        test.end_time = now
+        rollups.record_status_change(db, test, "running")
+        allocations.release(db, test)
+        events.record_execution(db, test)
+    db.commit()
+    if stale:
+        coalescer.invalidate("status", "locations")
+        logger.warning(f"Marked executions as lost (no heartbeat): {[t.run_id for t in stale]}")
+    return [t.run_id for t in stale]
+
+
+def _reaper_loop(interval):
+    next_maintenance = time.monotonic() + partitions.PARTITION_MAINTENANCE_SECONDS
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            for check in (reap_stale_executions, agents.expire_stale_jobs):
+                try:
+                    check(db)
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"{check.__name__} failed: {e}")
+        finally:
+            db.close()
+
+        # Keep the monthly partitions ahead of the clock (startup only covers MONTHS_AHEAD)
+        if time.monotonic() >= next_maintenance:
+            next_maintenance = time.monotonic() + partitions.PARTITION_MAINTENANCE_SECONDS
+            try:
+                partitions.maintain(engine, archive=partitions.ARCHIVE_PARTITIONS)
+            except Exception as e:
+                logger.warning(f"Partition maintenance failed: {e}")
+
+
+def start(interval=REAPER_INTERVAL_SECONDS):
+    threading.Thread(target=_reaper_loop, args=(interval,), daemon=True).start()
@@ -0,0 +1,58 @@
+# rollups.py
+from datetime import timezone
+from sqlalchemy.dialects.postgresql import insert
+import models
+
+DIMENSIONS = ("stream", "lac", "type", "location", "status", "script_version")
+
+
+def _utc(value):
+    # start_time is naive UTC right after /register but timezone-aware once loaded from the database
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _upsert(db, test, status, executions, duration_seconds=0, factor_hours=0):
+    values = {name: getattr(test, name) for name in DIMENSIONS}
+    values.update(
+        day=_utc(test.start_time).date(),
+        status=status,
+        executions=executions,
+        duration_seconds=duration_seconds,
+        factor_hours=factor_hours
+    )
+    table = models.ExecutionDailyRollup.__table__
+    stmt = insert(table).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day, *(table.c[name] for name in DIMENSIONS)],
+        set_={
+            "executions": table.c.executions + stmt.excluded.executions,
+            "duration_seconds": table.c.duration_seconds + stmt.excluded.duration_seconds,
+            "factor_hours": table.c.factor_hours + stmt.excluded.factor_hours
+        }
+    )
+    db.execute(stmt)
+
+
+def record_registration(db, test):
+    """
+    Count a newly registered (running) execution in its daily rollup row.
+    Runs in the caller's transaction; the caller commits.
+    """
+    _upsert(db, test, test.status, 1)
+
+
+def record_status_change(db, test, previous_status):
+    """
+    Move an execution from its previous status row to its current one, adding
+    its duration and factor-hours once it has an end_time.
+    Runs in the caller's transaction; the caller commits.
+    """
+    _upsert(db, test, previous_status, -1)
+    duration_seconds = 0
+    factor_hours = 0
+    if test.end_time is not None:
+        duration_seconds = max(0, (_utc(test.end_time) - _utc(test.start_time)).total_seconds())
+        factor_hours = float(test.factor) * duration_seconds / 3600
+    _upsert(db, test, test.status, 1, duration_seconds, factor_hours)
@@ -1,28 +1,105 @@
-import os, hvac
-from fastapi import Security, HTTPException, status, Depends
+import os, hashlib, logging, threading, time
+from collections import Counter
+from fastapi import Security, HTTPException, status, Depends, Request
 from fastapi.security.api_key import APIKeyHeader
+from vault import provider
+from database import SessionLocal
+import models
 
-# Set your Vault details (in production, pull these from environment variables)
-vault_url = os.environ.get("VAULT_URL")
-vault_token = os.environ.get("VAULT_TOKEN")
+logger = logging.getLogger("registry.security")
 
-# Initialize Vault client
-client = hvac.Client(url=vault_url, token=vault_token)
-
-# Retrieve secret from Vault (update the path to match your setup)
-secret_response = client.secrets.kv.v1.read_secret(
-    path='/data/performance-platform/application',
-    mount_point='devplatforms'
-)
-
-# Extract credentials
-API_KEY = secret_response['data']['data']['ptp_api_key']
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
 
-def get_api_key(api_key: str = Security(api_key_header)):
-    if api_key != API_KEY:
+# Client name for the shared key stored in Vault (ptp_api_key)
+DEFAULT_CLIENT = "default"
+API_KEYS_REFRESH_SECONDS = int(os.environ.get("API_KEYS_REFRESH_SECONDS", "60"))
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+class ApiKeyIndex:
+    """
+    In-memory index of SHA-256 key hashes to client names.
+
+    Built from the Vault key plus the active rows of the api_keys table on
+    first use, then rebuilt by a daemon thread every API_KEYS_REFRESH_SECONDS.
+    Also counts authenticated requests per client.
+    """
+
+    def __init__(self, refresh_seconds=API_KEYS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.usage = Counter()
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        index = {hash_api_key(provider['ptp_api_key']): DEFAULT_CLIENT}
+        db = SessionLocal()
+        try:
+            for row in db.query(models.ApiKey).filter(models.ApiKey.status == "active"):
+                index[row.key_hash] = row.client
+        except Exception as e:
+            logger.warning(f"Could not load api_keys, keeping previous entries: {e}")
+            if self._index:
+                index = {**self._index, **index}
+        finally:
+            db.close()
+        self._index = index
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self._load()
+            except Exception as e:
+                logger.warning(f"API key refresh failed: {e}")
+
+    def ensure_loaded(self):
+        """
+        Build the index and start its refresh thread on first use.
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load()
+                    threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def lookup(self, api_key: str):
+        """
+        Return the client name owning api_key, or None if the key is unknown.
+        """
+        self.ensure_loaded()
+
+        # Keys are matched by SHA-256 digest only: any timing difference in the lookup
+        # depends on the digest, so it says nothing about how much of a presented key was correct
+        client = self._index.get(hash_api_key(api_key))
+        if client is None:
+            return None
+        with self._lock:
+            self.usage[client] += 1
+        return client
+
+    def usage_snapshot(self):
+        """
+        Copy of the per-client request counts, taken under the lock that guards the increments.
+        """
+        with self._lock:
+            return dict(self.usage)
+
+api_keys = ApiKeyIndex()
+
+def get_api_key(request: Request, api_key: str = Security(api_key_header)):
+    # Evaluated once per request: the router-level and route-level dependencies share the result
+    client = getattr(request.state, "api_client", None)
+    if client is not None:
+        return client
+
+    client = api_keys.lookup(api_key)
+    if client is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API Key",
         )
+    request.state.api_client = client
+    return client
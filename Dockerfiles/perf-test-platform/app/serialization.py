@@ -0,0 +1,59 @@
+# serialization.py
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from fastapi.responses import Response
+
+# orjson is optional: fall back to the standard library encoder when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    # Same representation FastAPI's jsonable_encoder produces for these types
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded directly from plain Python values, skipping
+    FastAPI's response_model validation and jsonable_encoder pass.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def schema_columns(model, schema):
+    """
+    Precompute the model columns matching the fields of a pydantic schema, in order.
+    """
+    return [getattr(model, name) for name in schema.__fields__]
+
+
+def rows_to_dicts(columns, rows):
+    """
+    Turn column-tuple query results into dicts keyed by column name.
+
+    Args:
+        columns: list of column attributes the rows were queried with
+        rows: iterable of row tuples
+    """
+    names = [column.key for column in columns]
+    return [dict(zip(names, row)) for row in rows]
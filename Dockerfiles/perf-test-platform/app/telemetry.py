@@ -0,0 +1,127 @@
+# telemetry.py
+import os, logging, threading, time
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+import models
+from database import SessionLocal
+
+logger = logging.getLogger("registry.telemetry")
+
+# Raw samples kept in memory per server, and how often they are downsampled into worker_metrics
+SAMPLES_PER_SERVER = int(os.environ.get("TELEMETRY_SAMPLES_PER_SERVER", "120"))
+FLUSH_INTERVAL_SECONDS = int(os.environ.get("TELEMETRY_FLUSH_SECONDS", "60"))
+# Window of persisted metrics used to estimate headroom for /workers
+HEADROOM_WINDOW_MINUTES = int(os.environ.get("TELEMETRY_HEADROOM_MINUTES", "5"))
+RETENTION_DAYS = int(os.environ.get("TELEMETRY_RETENTION_DAYS", "7"))
+
+METRICS = ("cpu_percent", "load1", "mem_free_mb", "mem_total_mb", "net_rx_kbps", "net_tx_kbps")
+
+
+class MetricsBuffer:
+    """
+    Fixed-size ring buffer of raw samples per server. Samples received since
+    the last flush are averaged into one worker_metrics row per server.
+    """
+
+    def __init__(self, size=SAMPLES_PER_SERVER):
+        self.size = size
+        self._samples = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, servername, sample):
+        with self._lock:
+            if servername not in self._samples:
+                self._samples[servername] = deque(maxlen=self.size)
+            self._samples[servername].append(sample)
+            self._pending[servername] = self._pending.get(servername, 0) + 1
+
+    def take_pending(self):
+        """
+        Return {servername: averaged sample} for samples not yet flushed.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            averages = {}
+            for servername, count in pending.items():
+                recent = list(self._samples[servername])[-count:]
+                averages[servername] = {
+                    name: sum(s[name] for s in recent) / len(recent) for name in METRICS
+                }
+                averages[servername]["samples"] = len(recent)
+            return averages
+
+
+buffer = MetricsBuffer()
+
+
+def flush(db):
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    averages = buffer.take_pending()
+    table = models.WorkerMetric.__table__
+    for servername, values in averages.items():
+        stmt = insert(table).values(servername=servername, bucket_time=now, **values)
+        # Several API workers may flush the same server and minute: merge as a weighted average
+        total = table.c.samples + stmt.excluded.samples
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.servername, table.c.bucket_time],
+            set_={
+                **{
+                    name: (table.c[name] * table.c.samples + stmt.excluded[name] * stmt.excluded.samples) / total
+                    for name in METRICS
+                },
+                "samples": total
+            }
+        )
+        db.execute(stmt)
+    db.query(models.WorkerMetric).filter(
+        models.WorkerMetric.bucket_time < now - timedelta(days=RETENTION_DAYS)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return len(averages)
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            flush(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Telemetry flush failed: {e}")
+        finally:
+            db.close()
+
+
+def start(interval=FLUSH_INTERVAL_SECONDS):
+    threading.Thread(target=_flush_loop, args=(interval,), daemon=True).start()
+
+
+def headroom(db, servernames):
+    """
+    Estimate the free share (0..1) of each server from its recent metrics:
+    the lower of idle CPU and free memory. Servers without recent metrics
+    are not included.
+    """
+    since = datetime.utcnow() - timedelta(minutes=HEADROOM_WINDOW_MINUTES)
+    rows = (
+        db.query(
+            models.WorkerMetric.servername,
+            func.avg(models.WorkerMetric.cpu_percent).label("cpu_percent"),
+            func.avg(models.WorkerMetric.mem_free_mb).label("mem_free_mb"),
+            func.avg(models.WorkerMetric.mem_total_mb).label("mem_total_mb")
+        )
+        .filter(models.WorkerMetric.servername.in_(servernames))
+        .filter(models.WorkerMetric.bucket_time >= since)
+        .group_by(models.WorkerMetric.servername)
+        .all()
+    )
+    result = {}
+    for row in rows:
+        cpu_free = 1 - float(row.cpu_percent) / 100
+        mem_free = float(row.mem_free_mb) / float(row.mem_total_mb) if row.mem_total_mb else 1
+        result[row.servername] = max(0.0, min(1.0, cpu_free, mem_free))
+    return result
@@ -0,0 +1,136 @@
+# throttling.py
+import os, threading, time
+from fastapi import HTTPException, Depends
+from security import get_api_key, DEFAULT_CLIENT
+
+# Token bucket per API client: sustained requests per second and burst size
+RATE_LIMIT_PER_SECOND = float(os.environ.get("RATE_LIMIT_PER_SECOND", "20"))
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", "60"))
+# Clients never throttled, comma-separated. The shared Vault key (ptp_api_key) is used by every
+# runner script, runner agent, telemetry sender and the scheduler at once, so one bucket for all
+# of them would throttle every test in flight; clients to isolate get their own key in api_keys
+RATE_LIMIT_EXEMPT_CLIENTS = {c.strip() for c in os.environ.get("RATE_LIMIT_EXEMPT_CLIENTS", DEFAULT_CLIENT).split(",") if c.strip()}
+
+# How long a coalesced read result is shared with identical requests
+COALESCE_WINDOW_SECONDS = float(os.environ.get("COALESCE_WINDOW_SECONDS", "1.0"))
+# Most keys kept by the coalescer (keys include request parameters, e.g. configuration:{parameter})
+COALESCE_MAX_KEYS = int(os.environ.get("COALESCE_MAX_KEYS", "1024"))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """
+        Consume one token. Returns 0 when allowed, otherwise the seconds
+        until a token becomes available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def check(self, client):
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            return bucket.take()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads: the first caller for a key runs the
+    query, callers arriving meanwhile wait for its result, and the result is
+    reused for COALESCE_WINDOW_SECONDS afterwards. Errors are not cached.
+
+    At most max_keys keys are kept: expired results are dropped when the limit
+    is reached, and reads beyond it run uncoalesced. With cache=False the result
+    is only shared with the callers already waiting for it.
+    """
+
+    def __init__(self, window=COALESCE_WINDOW_SECONDS, max_keys=COALESCE_MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, c in self._calls.items() if c["expires"] is not None and c["expires"] < now]:
+            del self._calls[key]
+
+    def do(self, key, func, cache=True):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call["expires"] is not None and call["expires"] < time.monotonic():
+                call = None
+            leader = call is None
+            if leader and key not in self._calls and len(self._calls) >= self.max_keys:
+                self._evict_expired()
+            uncoalesced = leader and key not in self._calls and len(self._calls) >= self.max_keys
+            if leader and not uncoalesced:
+                call = self._calls[key] = {"done": threading.Event(), "expires": None, "result": None, "error": None}
+
+        if uncoalesced:
+            return func()
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = func()
+            call["expires"] = time.monotonic() + self.window
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            if call["error"] is not None or not cache:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+            call["done"].set()
+        return call["result"]
+
+    def invalidate(self, *keys):
+        # Drop finished entries so the next read sees a write made by this worker. Other
+        # gunicorn workers keep theirs, so they may serve the previous value for up to window seconds
+        with self._lock:
+            for key in keys:
+                call = self._calls.get(key)
+                if call is not None and call["expires"] is not None:
+                    del self._calls[key]
+
+
+rate_limiter = RateLimiter()
+coalescer = SingleFlight()
+
+
+def rate_limit(client: str = Depends(get_api_key)):
+    if client in RATE_LIMIT_EXEMPT_CLIENTS:
+        return
+    retry_after = rate_limiter.check(client)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for client '{client}'",
+            headers={"Retry-After": str(max(1, round(retry_after)))}
+        )
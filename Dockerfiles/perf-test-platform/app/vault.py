@@ -0,0 +1,88 @@
+# vault.py
+import os, json, logging, threading, time
+
+logger = logging.getLogger("registry.vault")
+
+# Set your Vault details (in production, pull these from environment variables)
+VAULT_URL = os.environ.get("VAULT_URL")
+VAULT_TOKEN = os.environ.get("VAULT_TOKEN")
+SECRET_PATH = '/data/performance-platform/application'
+SECRET_MOUNT_POINT = 'devplatforms'
+
+# Local JSON file with the same keys as the Vault secret, used instead of Vault when set (testing)
+SECRETS_FILE = os.environ.get("SECRETS_FILE")
+
+# Refresh interval when Vault does not return a lease, and retry delay after a failed refresh
+SECRETS_TTL_SECONDS = int(os.environ.get("SECRETS_TTL_SECONDS", "300"))
+SECRETS_RETRY_SECONDS = 30
+
+
+class SecretProvider:
+    """
+    Loads the application secret on first use and keeps it cached.
+
+    A daemon thread refreshes the cached values before the Vault lease (or the
+    configured TTL) expires, so rotated credentials are picked up without a
+    restart. If a refresh fails the previous values keep being served.
+    """
+
+    def __init__(self, path=SECRET_PATH, mount_point=SECRET_MOUNT_POINT,
+                 ttl=SECRETS_TTL_SECONDS, secrets_file=SECRETS_FILE):
+        self.path = path
+        self.mount_point = mount_point
+        self.ttl = ttl
+        self.secrets_file = secrets_file
+        self._data = None
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def _fetch(self):
+        # Returns the secret dict and the number of seconds it can be cached
+        if self.secrets_file:
+            with open(self.secrets_file, 'r', encoding='utf-8') as f:
+                return json.load(f), self.ttl
+
+        import hvac
+        client = hvac.Client(url=VAULT_URL, token=VAULT_TOKEN)
+        secret_response = client.secrets.kv.v1.read_secret(
+            path=self.path,
+            mount_point=self.mount_point
+        )
+        lease = secret_response.get('lease_duration') or self.ttl
+        # Refresh ahead of the lease expiry, never later than the configured TTL
+        return secret_response['data']['data'], min(int(lease * 0.8), self.ttl)
+
+    def _refresh_loop(self, delay):
+        while True:
+            time.sleep(delay)
+            try:
+                data, delay = self._fetch()
+                self._data = data
+            except Exception as e:
+                logger.warning(f"Secret refresh failed, serving cached values: {e}")
+                delay = SECRETS_RETRY_SECONDS
+
+    def data(self):
+        """
+        Return the cached secret, fetching it on the first call.
+        """
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    data, delay = self._fetch()
+                    self._data = data
+                    self._refresher = threading.Thread(
+                        target=self._refresh_loop, args=(delay,), daemon=True
+                    )
+                    self._refresher.start()
+        return self._data
+
+    def get(self, key, default=None):
+        return self.data().get(key, default)
+
+    def __getitem__(self, key):
+        return self.data()[key]
+
+
+# Shared by database.py and security.py so each worker reads the secret once
+provider = SecretProvider()
@@ -0,0 +1,282 @@
+#!/usr/bin/python
+# Load / soak benchmark of the registry API itself.
+#
+# Starts the FastAPI app from main.py in a separate process (uvicorn, or gunicorn with the production
+# gunicorn.conf.py) on a local port against the database configured through SECRETS_FILE, seeds
+# worker locations and historical test_executions, and runs simulated runners doing the call mix of
+# run-test-performance.sh from this process, so the load generators don't share the server's GIL:
+#
+#   GET /configuration/status -> GET /workers -> POST /register
+#   -> polls of GET /configuration/status + POST /heartbeat -> POST /complete
+#
+# Reports throughput and p50/p99 latency per endpoint, and compares them with a stored baseline.
+# Use a dedicated database: benchmark rows (location 'bench-location') are replaced on every run.
+# The registry depends on PostgreSQL features (JSONB, partitions, SKIP LOCKED), so a local
+# PostgreSQL is required; an empty throwaway instance is enough.
+#
+# Usage: SECRETS_FILE=secrets.json python3 registry_load_benchmark.py [options]
+#   --server NAME        uvicorn (one process) or gunicorn (production config, WEB_CONCURRENCY workers) (default uvicorn)
+#   --runners N          concurrent simulated runners (default 200)
+#   --duration S         seconds to run, use e.g. 3600 for a soak test (default 60)
+#   --polls N            status polls per simulated test run (default 5)
+#   --seed-executions N  historical executions to insert (default 5000)
+#   --baseline FILE      baseline JSON (default registry_load_baseline.json next to this script)
+#   --save-baseline      store this run's results as the new baseline
+#   --tolerance PCT      allowed p99 increase / throughput drop before failing (default 20)
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Every simulated runner shares one API key; lift the per-client rate limit unless set explicitly
+os.environ.setdefault("RATE_LIMIT_PER_SECOND", "1000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "1000000")
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from sqlalchemy import insert
+import models
+from database import SessionLocal
+from vault import provider
+
+LOCATION = "bench-location"
+ENVIRONMENT = "PP"
+WORKERS = 20
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registry_load_baseline.json")
+
+
+def seed(executions):
+    db = SessionLocal()
+    try:
+        db.query(models.TestExecution).filter(models.TestExecution.location == LOCATION).delete(synchronize_session=False)
+        db.query(models.Location).filter(models.Location.location == LOCATION).delete(synchronize_session=False)
+        db.add_all([
+            models.Location(location=LOCATION, servername=f"bench-worker-{i:02d}.local", type="worker",
+                            environment=ENVIRONMENT, factor=1000, status="up")
+            for i in range(WORKERS)
+        ])
+        if not db.query(models.Configuration).filter(models.Configuration.parameter == "status").first():
+            db.add(models.Configuration(parameter="status", value="online"))
+
+        # Finished runs spread over the last 60 days
+        now = datetime.utcnow()
+        rows = []
+        for i in range(executions):
+            start = now - timedelta(minutes=random.randint(60, 60 * 24 * 60))
+            rows.append(dict(
+                id=uuid.uuid4(), run_id=-(i + 1), repo="registry-benchmark", lac=f"LAC.{i % 50:04d}",
+                stream="BENCH", test=f"TEST.{i % 7:04d}", type="load-test", environment=ENVIRONMENT,
+                triggered_by="benchmark", status=random.choice(["success", "success", "success", "failed"]),
+                start_time=start, end_time=start + timedelta(minutes=random.randint(5, 90)), factor=1,
+                location=LOCATION, container_name=f"bench-{i}", execution_type="distributed",
+                workers=[f"bench-worker-{i % WORKERS:02d}.local"], tool="jmeter", script_version="bench"
+            ))
+        for offset in range(0, len(rows), 1000):
+            db.execute(insert(models.TestExecution.__table__), rows[offset:offset + 1000])
+        db.commit()
+    finally:
+        db.close()
+
+
+class Client:
+    def __init__(self, port, api_key, stats):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.headers = {"X-API-Key": api_key, "Content-Type": "application/json", "accept": "application/json"}
+        self.stats = stats
+
+    def call(self, name, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, f"/v3{path}", body=body, headers=self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            data, status = b"", 0
+        self.stats.record(name, time.perf_counter() - started, status)
+        return status, (json.loads(data) if data and status == 200 else None)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, status):
+        with self._lock:
+            if status == 200:
+                self.latencies[name].append(seconds)
+            else:
+                self.errors[name][status] += 1
+
+    def summary(self, duration):
+        result = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            pick = lambda pct: values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000 if values else None
+            result[name] = {
+                "requests": len(values),
+                "errors": dict(self.errors[name]),
+                "throughput": round(len(values) / duration, 2),
+                "p50_ms": round(pick(50), 2) if values else None,
+                "p99_ms": round(pick(99), 2) if values else None
+            }
+        return result
+
+
+def runner(index, port, api_key, stats, stop_at, polls):
+    client = Client(port, api_key, stats)
+    random.seed(index)
+    while time.monotonic() < stop_at:
+        client.call("GET /configuration/status", "GET", "/configuration/status")
+        status, workers = client.call(
+            "GET /workers", "GET", f"/workers?location={LOCATION}&environment={ENVIRONMENT}&factor=2.0"
+        )
+        status, registered = client.call("POST /register", "POST", "/register", {
+            "repo": "registry-benchmark", "lac": f"LAC.{index % 50:04d}", "stream": "BENCH",
+            "test": f"TEST.{index % 7:04d}", "type": "load-test", "environment": ENVIRONMENT,
+            "triggered_by": "benchmark", "factor": 1.0, "location": LOCATION,
+            "container_name": f"bench-runner-{index}", "execution_type": "distributed",
+            "workers": workers if isinstance(workers, list) else [], "tool": "jmeter", "script_version": "bench"
+        })
+        if not registered:
+            time.sleep(1)
+            continue
+        run_id = int(registered["run_id"])
+        for _ in range(polls):
+            time.sleep(random.uniform(0.5, 1.5))
+            client.call("GET /configuration/status", "GET", "/configuration/status")
+            client.call("POST /heartbeat", "POST", "/heartbeat", {"run_id": run_id})
+        client.call("POST /complete", "POST", "/complete", {"run_id": run_id, "status": "success"})
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None or current["p99_ms"] is None:
+            failures.append(f"{name}: no successful requests")
+            continue
+        if base["p99_ms"] and current["p99_ms"] > base["p99_ms"] * (1 + tolerance / 100):
+            failures.append(f"{name}: p99 {current['p99_ms']} ms vs baseline {base['p99_ms']} ms")
+        if base["throughput"] and current["throughput"] < base["throughput"] * (1 - tolerance / 100):
+            failures.append(f"{name}: throughput {current['throughput']}/s vs baseline {base['throughput']}/s")
+    return failures
+
+
+def start_server(kind, port):
+    """
+    Start the registry in its own process and wait until GET /ready answers 200.
+    """
+    env = dict(os.environ, PORT=str(port))
+    if kind == "gunicorn":
+        # As entrypoint.sh: prepare the schema once, so the preloaded master holds no database connection
+        subprocess.run([sys.executable, "prestart.py"], cwd=APP_DIR, check=True)
+        env["SCHEMA_SETUP"] = "prestart"
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning"]
+    server = subprocess.Popen(command, cwd=APP_DIR, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"Registry server exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/ready")
+            if connection.getresponse().status == 200:
+                return server
+        except (http.client.HTTPException, OSError):
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    sys.exit("Registry server did not become ready within 60s")
+
+
+def rss_mb(pid):
+    # Resident memory of the server process and its children (the gunicorn workers)
+    total, pids = 0, [pid]
+    while pids:
+        pid = pids.pop()
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+            with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+                pids += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+    return total / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load / soak benchmark of the registry API")
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn")
+    parser.add_argument("--runners", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--polls", type=int, default=5)
+    parser.add_argument("--seed-executions", type=int, default=5000)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"Seeding {WORKERS} workers and {args.seed_executions} executions...")
+    seed(args.seed_executions)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = start_server(args.server, port)
+
+    stats = Stats()
+    rss_start = rss_mb(server.pid)
+    print(f"Running {args.runners} runners for {args.duration:.0f}s against port {port}...")
+    started = time.monotonic()
+    stop_at = started + args.duration
+    threads = [
+        threading.Thread(target=runner, args=(i, port, provider['ptp_api_key'], stats, stop_at, args.polls), daemon=True)
+        for i in range(args.runners)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.monotonic() - started
+    rss_end = rss_mb(server.pid)
+    server.terminate()
+    server.wait()
+
+    results = stats.summary(duration)
+    print(f"\n{'endpoint':<28} {'req':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}  errors")
+    for name, r in results.items():
+        print(f"{name:<28} {r['requests']:>8} {r['throughput']:>9} {r['p50_ms'] or '-':>9} {r['p99_ms'] or '-':>9}  {r['errors'] or ''}")
+    print(f"\nServer RSS: {rss_start:.0f} MB -> {rss_end:.0f} MB")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with (run with --save-baseline to create one)")
+        sys.exit(0)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        failures = compare(results, json.load(f), args.tolerance)
+    for failure in failures:
+        print(f"[REGRESSION] {failure}")
+    sys.exit(1 if failures else 0)
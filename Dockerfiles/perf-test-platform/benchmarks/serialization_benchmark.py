@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# Micro-benchmark of the /status and /history response encoding.
+#
+# Compares the previous path (ORM object -> TestExecutionSchema.from_orm ->
+# jsonable_encoder -> json.dumps) with the row-tuple path used by the v3
+# endpoints (column tuples -> dicts -> serialization.dumps).
+#
+# Usage: python3 serialization_benchmark.py [rows] [repeat]
+
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from fastapi.encoders import jsonable_encoder
+from api.v3 import schemas
+import serialization
+
+FIELDS = list(schemas.TestExecutionSchema.__fields__)
+COLUMNS = [SimpleNamespace(key=name) for name in FIELDS]
+
+
+def make_rows(count):
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append((
+            uuid.uuid4(), i + 1, "performance-testing", "LAC.0001", "DIGITAL", "TEST.0001",
+            "load-test", "PP", "github", "success", start + timedelta(minutes=i),
+            start + timedelta(minutes=i, seconds=600), Decimal("0.50"),
+            "https://onenr.io/0dQe78egdRe", "on-premise-vm", f"jmeter-{i}", "distributed",
+            ["dcvx-jmtapp-g2.mch.moc.sgps", "dcvx-jmtapp-g3.mch.moc.sgps"], "jmeter", "v1.0.0"
+        ))
+    return rows
+
+
+def encode_orm(objects):
+    content = {"executions": [schemas.TestExecutionSchema.from_orm(o) for o in objects]}
+    return json.dumps(jsonable_encoder(content)).encode("utf-8")
+
+
+def encode_rows(rows):
+    return serialization.dumps({"executions": serialization.rows_to_dicts(COLUMNS, rows)})
+
+
+def measure(label, func, arg, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} {best * 1000:10.1f} ms {rows / best:14,.0f} rows/s")
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    rows = make_rows(count)
+    objects = [SimpleNamespace(**dict(zip(FIELDS, row))) for row in rows]
+
+    print(f"Encoding {count} rows (best of {repeat}), orjson: {'yes' if serialization.orjson else 'no'}")
+    before = measure("from_orm + jsonable_encoder", encode_orm, objects, count, repeat)
+    after = measure("row tuples + serialization.dumps", encode_rows, rows, count, repeat)
+    print(f"Speedup: {before / after:.1f}x")
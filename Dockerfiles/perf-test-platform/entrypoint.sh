@@ -1,3 +1,14 @@
 #!/bin/bash
 
-cd ${HOME}/app/; python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 --workers 4 --reload
\ No newline at end of file
+cd ${HOME}/app/
+
+# REGISTRY_MODE=development: single process reloading on code changes, schema checks at import
+if [ "${REGISTRY_MODE}" == "development" ]; then
+    exec python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+fi
+
+# Production: schema and partition checks run once, then gunicorn imports the app once and forks the
+# workers (see app/gunicorn.conf.py). Readiness: GET /ready
+python3 prestart.py || exit 1
+export SCHEMA_SETUP=prestart
+exec python3 -m gunicorn main:app -c gunicorn.conf.py
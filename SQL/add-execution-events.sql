@@ -0,0 +1,10 @@
+-- Add the append-only execution lifecycle event table read through /events (events.py).
+-- Only changes made after the upgrade are recorded; there is no backfill of past executions.
+
+CREATE TABLE IF NOT EXISTS execution_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(30) NOT NULL, -- "registered", "completed", "cancelled", "lost", "location_status"
+    run_id INT,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
@@ -0,0 +1,43 @@
+-- Add the per-worker factor allocations used by /workers and /locations (allocations.py) and
+-- backfill them from test_executions.workers, splitting each factor evenly as the registry used to.
+-- Run before deploying the registry version that reads execution_workers; safe to re-run.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS execution_workers (
+    execution_id UUID NOT NULL, -- test_executions.id
+    servername VARCHAR(255) NOT NULL,
+    run_id INT NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    environment VARCHAR(255) NOT NULL,
+    factor NUMERIC NOT NULL,
+    start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    end_time TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (execution_id, servername)
+);
+CREATE INDEX IF NOT EXISTS ix_execution_workers_running ON execution_workers (location, environment, servername) INCLUDE (factor) WHERE end_time IS NULL;
+CREATE INDEX IF NOT EXISTS ix_execution_workers_run_id ON execution_workers (run_id);
+
+-- Keep new registrations from slipping between the backfill and the deployment
+LOCK TABLE test_executions IN SHARE MODE;
+
+INSERT INTO execution_workers (execution_id, servername, run_id, location, environment, factor, start_time, end_time)
+SELECT
+    e.id,
+    w.servername,
+    e.run_id,
+    e.location,
+    e.environment,
+    e.factor * w.shares / jsonb_array_length(e.workers),
+    e.start_time,
+    CASE WHEN e.status = 'running' THEN NULL ELSE COALESCE(e.end_time, e.start_time) END
+FROM test_executions e
+CROSS JOIN LATERAL (
+    SELECT value AS servername, COUNT(*) AS shares
+    FROM jsonb_array_elements_text(e.workers)
+    GROUP BY value
+) w
+WHERE jsonb_typeof(e.workers) = 'array' AND jsonb_array_length(e.workers) > 0
+ON CONFLICT (execution_id, servername) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- Add the runner heartbeat column used by the stale execution reaper (reaper.py).
+-- Column order differs from init-db.sql on upgraded databases; the registry only addresses columns by name.
+
+ALTER TABLE test_executions ADD COLUMN IF NOT EXISTS last_heartbeat TIMESTAMP WITH TIME ZONE;
+-- The archive table only exists once partition archiving has run
+ALTER TABLE IF EXISTS test_executions_archive ADD COLUMN IF NOT EXISTS last_heartbeat TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,27 @@
+-- Rebuild execution_daily_rollups from test_executions.
+-- Run once after creating the table on an existing database (or to repair drift).
+-- Days are UTC, matching the rows the registry maintains.
+
+BEGIN;
+
+LOCK TABLE execution_daily_rollups IN EXCLUSIVE MODE;
+
+DELETE FROM execution_daily_rollups;
+
+INSERT INTO execution_daily_rollups
+    (day, stream, lac, type, location, status, script_version, executions, duration_seconds, factor_hours)
+SELECT
+    (start_time AT TIME ZONE 'UTC')::date,
+    stream,
+    lac,
+    type,
+    location,
+    status,
+    script_version,
+    COUNT(*),
+    COALESCE(SUM(EXTRACT(EPOCH FROM (end_time - start_time))), 0),
+    COALESCE(SUM(factor * EXTRACT(EPOCH FROM (end_time - start_time)) / 3600), 0)
+FROM test_executions
+GROUP BY 1, stream, lac, type, location, status, script_version;
+
+COMMIT;
@@ -19,9 +19,9 @@ GRANT ALL PRIVILEGES ON TABLES TO performance_installer;
 
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
 
--- Create table to store test execution data
+-- Create table to store test execution data (monthly partitions by start_time, see partitions.py)
 CREATE TABLE test_executions (
-    id UUID PRIMARY KEY,
+    id UUID NOT NULL,
     run_id INT NOT NULL,
     repo VARCHAR(255) NOT NULL,
     lac VARCHAR(255) NOT NULL,
@@ -33,6 +33,7 @@ CREATE TABLE test_executions (
     status VARCHAR(50) NOT NULL,
     start_time TIMESTAMP WITH TIME ZONE NOT NULL,
     end_time TIMESTAMP WITH TIME ZONE,
+    last_heartbeat TIMESTAMP WITH TIME ZONE, -- last /heartbeat from the runner
     factor NUMERIC(3, 2) NOT NULL,
     dashboard_url VARCHAR(255) NULL,
     location VARCHAR(255) NOT NULL,
@@ -40,7 +41,31 @@ CREATE TABLE test_executions (
     execution_type VARCHAR(50) NOT NULL,
     workers JSONB,
     tool VARCHAR(50) NOT NULL,
-    script_version VARCHAR(8) NOT NULL
+    script_version VARCHAR(8) NOT NULL,
+    PRIMARY KEY (id, start_time)
+) PARTITION BY RANGE (start_time);
+
+CREATE TABLE test_executions_default PARTITION OF test_executions DEFAULT;
+CREATE INDEX ON test_executions (run_id);
+CREATE INDEX ON test_executions (start_time) WHERE status = 'running';
+CREATE INDEX ON test_executions (lac, test, type, start_time) WHERE status = 'success'; -- duration history (/predict)
+
+-- Archived (detached) partitions older than the retention period
+CREATE TABLE test_executions_archive (LIKE test_executions INCLUDING DEFAULTS);
+
+-- Daily execution rollups maintained by the registry on /register and /complete (Grafana dashboards)
+CREATE TABLE execution_daily_rollups (
+    day DATE NOT NULL,
+    stream VARCHAR(255) NOT NULL,
+    lac VARCHAR(255) NOT NULL,
+    type VARCHAR(255) NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    script_version VARCHAR(8) NOT NULL,
+    executions INT NOT NULL DEFAULT 0,
+    duration_seconds NUMERIC NOT NULL DEFAULT 0,
+    factor_hours NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, stream, lac, type, location, status, script_version)
 );
 
 -- Create table to store locations (servers)
@@ -64,6 +89,70 @@ INSERT  INTO locations (id,location, servername, type, environment, factor, stat
 (gen_random_uuid(),'azure-vm', 'azvx-jmtapp-g1.mch.moc.sgps', 'orchestrator','PP', 1.0, 'up')
 ;
 
+-- One-minute averages of worker host metrics posted to /telemetry
+CREATE TABLE worker_metrics (
+    servername VARCHAR(255) NOT NULL,
+    bucket_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    samples INT NOT NULL,
+    cpu_percent NUMERIC NOT NULL,
+    load1 NUMERIC NOT NULL,
+    mem_free_mb NUMERIC NOT NULL,
+    mem_total_mb NUMERIC NOT NULL,
+    net_rx_kbps NUMERIC NOT NULL,
+    net_tx_kbps NUMERIC NOT NULL,
+    PRIMARY KEY (servername, bucket_time)
+);
+CREATE INDEX ON worker_metrics (bucket_time);
+
+-- Container start/stop jobs pulled by the runner agent on each worker (python/runner-agent.py)
+CREATE TABLE agent_jobs (
+    id UUID PRIMARY KEY,
+    run_id INT NOT NULL,
+    servername VARCHAR(255) NOT NULL,
+    action VARCHAR(20) NOT NULL, -- "start", "stop"
+    spec JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL, -- "queued", "claimed", "running", "succeeded", "failed"
+    exit_code INT,
+    log_tail TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+CREATE INDEX ix_agent_jobs_servername_status ON agent_jobs (servername, status);
+CREATE INDEX ix_agent_jobs_run_id ON agent_jobs (run_id);
+
+-- Factor allocated to each worker of an execution (capacity for /workers and /locations);
+-- end_time is NULL while the execution is running
+CREATE TABLE execution_workers (
+    execution_id UUID NOT NULL, -- test_executions.id
+    servername VARCHAR(255) NOT NULL,
+    run_id INT NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    environment VARCHAR(255) NOT NULL,
+    factor NUMERIC NOT NULL,
+    start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    end_time TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (execution_id, servername)
+);
+CREATE INDEX ix_execution_workers_running ON execution_workers (location, environment, servername) INCLUDE (factor) WHERE end_time IS NULL;
+CREATE INDEX ix_execution_workers_run_id ON execution_workers (run_id);
+
+-- Append-only execution lifecycle events read incrementally through /events (id = offset);
+-- new offsets are announced with NOTIFY on the execution_events channel
+CREATE TABLE execution_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(30) NOT NULL, -- "registered", "completed", "cancelled", "lost", "location_status"
+    run_id INT,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Create table to store per-client API keys (SHA-256 hex digest, never the key itself)
+CREATE TABLE api_keys (
+    client VARCHAR(255) PRIMARY KEY, -- runner or team owning the key
+    key_hash VARCHAR(64) NOT NULL UNIQUE,
+    status VARCHAR(10) NOT NULL -- "active", "revoked"
+);
+
 -- Create configuration table
 CREATE TABLE configurations (
     parameter VARCHAR(255) PRIMARY KEY,
@@ -74,6 +163,9 @@ INSERT INTO configurations (parameter, value) VALUES
 ('dpt_registry_url', 'http://dcvx-jmtapp-g1.mch.moc.sgps:8000'), 
 ('jira_url', 'https://ecom4isi.atlassian.net/rest/api'),
 ('status', 'online'), --online: jobs allowed, offline: jobs not allowed, abort: abort all running jobs
+('query_profiling', 'off'), --on: record per-statement timings and log slow queries with EXPLAIN
+('slow_query_threshold_ms', '500'),
+('runner_agent', 'disabled'), --enabled: distributed tests are dispatched to python/runner-agent.py on the workers instead of ssh
 ('ssh_user','jmeter'),
 ('vault_url','http://dcvx-jmtapp-g1:8200'),
 ('xray_url', 'https://eu.xray.cloud.getxray.app/api/v2');
\ No newline at end of file
@@ -0,0 +1,44 @@
+-- Convert an existing, unpartitioned test_executions table into monthly range partitions by start_time.
+-- Stop the registry before running. Partitions for upcoming months are created by the registry
+-- (partitions.ensure_partitions, at startup and periodically from the reaper thread) and by "python3 partitions.py maintain".
+
+BEGIN;
+
+ALTER TABLE test_executions RENAME TO test_executions_unpartitioned;
+
+CREATE TABLE test_executions (LIKE test_executions_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (start_time);
+ALTER TABLE test_executions ADD PRIMARY KEY (id, start_time);
+
+-- One partition per month present in the data, up to two months ahead
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE(MIN(start_time AT TIME ZONE 'UTC'), now())),
+            date_trunc('month', now()) + interval '2 months',
+            interval '1 month'
+        )::date
+        FROM test_executions_unpartitioned
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF test_executions FOR VALUES FROM (%L) TO (%L)',
+            'test_executions_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            month, (month + interval '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+CREATE TABLE test_executions_default PARTITION OF test_executions DEFAULT;
+CREATE INDEX ON test_executions (run_id);
+CREATE INDEX ON test_executions (start_time) WHERE status = 'running';
+CREATE INDEX ON test_executions (lac, test, type, start_time) WHERE status = 'success'; -- duration history (/predict)
+
+INSERT INTO test_executions SELECT * FROM test_executions_unpartitioned;
+
+CREATE TABLE IF NOT EXISTS test_executions_archive (LIKE test_executions INCLUDING DEFAULTS);
+
+DROP TABLE test_executions_unpartitioned;
+
+COMMIT;
@@ -1,20 +1,76 @@
 #!/usr/bin/python
 
 import json
+import bisect
 import csv
+import math
+import os
+import re
+import sqlite3
 import sys
-from datetime import datetime
-from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from collections import defaultdict, Counter
 from xml.etree.ElementTree import Element, SubElement, ElementTree
 
-def convert_chaos_journal_to_junit(journal_path, junit_path):
-    # Load the Chaos Toolkit journal JSON file
-    with open(journal_path, 'r') as f:
-        journal = json.load(f)
-
-    # Root element of JUnit XML
-    testsuites = Element('testsuites')
-
+# Local store of per-label run summaries used as the regression baseline. It lives on the host running
+# the conversion (the orchestrator), so each orchestrator keeps its own history: point BASELINE_STORE
+# at shared storage for one baseline per deployment
+BASELINE_STORE = os.environ.get("BASELINE_STORE", os.path.expanduser("~/.perf-baselines.sqlite"))
+# Only runs stored from this date (YYYY-MM-DD) on form the baseline, e.g. after an accepted performance
+# change; test.performance.baseline_since in the test definition takes precedence
+BASELINE_SINCE = os.environ.get("BASELINE_SINCE", "")
+BASELINE_RUNS = int(os.environ.get("BASELINE_RUNS", "10"))
+BASELINE_MIN_RUNS = int(os.environ.get("BASELINE_MIN_RUNS", "3"))
+# A change is a regression only if it is both larger than this and statistically significant
+REGRESSION_TOLERANCE_PCT = float(os.environ.get("REGRESSION_TOLERANCE_PCT", "10"))
+REGRESSION_Z = float(os.environ.get("REGRESSION_Z", "3.0"))
+
+# Log-bucketed latency sketch: every bucket spans 2% so percentiles are within ~1% of the exact value
+SKETCH_GAMMA = 1.02
+
+# Error signatures tracked per label (bounded, see ErrorSignatures) and how many are reported in the JUnit failure
+ERROR_SIGNATURES_TRACKED = int(os.environ.get("ERROR_SIGNATURES_TRACKED", "64"))
+ERROR_SIGNATURES_TOP = int(os.environ.get("ERROR_SIGNATURES_TOP", "10"))
+SIGNATURE_MAX_LENGTH = 200
+
+# Chaos impact analysis ("chaos" mode, run by hand with the JTL of a load applied during the experiment):
+# JMeter samples in the window before each activity are its baseline, and the window after it is cut
+# into buckets to find when latency and errors are back within thresholds
+CHAOS_BASELINE_SECONDS = int(os.environ.get("CHAOS_BASELINE_SECONDS", "60"))
+CHAOS_RECOVERY_SECONDS = int(os.environ.get("CHAOS_RECOVERY_SECONDS", "300"))
+CHAOS_BUCKET_SECONDS = int(os.environ.get("CHAOS_BUCKET_SECONDS", "5"))
+CHAOS_STABLE_BUCKETS = 3  # consecutive healthy buckets that count as recovered
+# Defaults for test.resilience.thresholds in the test definition
+CHAOS_THRESHOLDS = {"max_p90_increase_pct": 50.0, "max_error_pct": 5.0, "max_recovery_seconds": 60.0}
+
+# Variable parts of error messages (ids, timestamps, numbers) replaced so equal errors share one signature;
+# one alternation so each message is scanned once, earlier alternatives win
+SIGNATURE_PATTERN = re.compile('|'.join([
+    r'(?P<ts>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)',
+    r'(?P<uuid>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)',
+    r'(?P<email>\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b)',
+    r'(?P<ip>\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b)',
+    r'(?P<id>\b(?=[\w-]*\d)(?=[\w-]*[A-Za-z])[\w-]{12,}\b)',
+    r'(?P<n>\d+)',
+]))
+
+def journal_time_ms(value):
+    # Chaos Toolkit writes naive UTC ISO timestamps; older journals may hold epoch seconds or milliseconds
+    if isinstance(value, (int, float)):
+        return int(value if value > 1e11 else value * 1000)
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def activity_name(step):
+    activity = step.get('activity', step.get('name', 'unnamed-test'))
+    return activity.get('name', 'unnamed-test') if isinstance(activity, dict) else str(activity)
+
+
+def chaos_journal_testsuite(journal, testsuites):
     # Create a single testsuite element
     testsuite = SubElement(testsuites, 'testsuite')
     testsuite.attrib['name'] = journal.get('experiment', {}).get('title', 'Chaos Toolkit Experiment')
@@ -28,12 +84,12 @@ def convert_chaos_journal_to_junit(journal_path, junit_path):
 
     for step in run_steps:
         # Get step name
-        test_name = step.get('activity', step.get('name', 'unnamed-test'))
+        test_name = activity_name(step)
 
-        # Calculate duration in seconds (timestamps are usually in milliseconds)
-        start_time = step.get('start', 0)
-        end_time = step.get('end', 0)
-        duration = max(0, end_time - start_time) / 1000
+        # Calculate duration in seconds
+        start_time = step.get('start')
+        end_time = step.get('end')
+        duration = max(0, journal_time_ms(end_time) - journal_time_ms(start_time)) / 1000 if start_time and end_time else 0.0
 
         testcase = SubElement(testsuite, 'testcase')
         testcase.attrib['name'] = test_name
@@ -54,6 +110,17 @@ def convert_chaos_journal_to_junit(journal_path, junit_path):
     testsuite.attrib['tests'] = str(total_tests)
     testsuite.attrib['failures'] = str(total_failures)
     testsuite.attrib['time'] = f"{total_time:.3f}"
+    return testsuite
+
+
+def convert_chaos_journal_to_junit(journal_path, junit_path):
+    # Load the Chaos Toolkit journal JSON file
+    with open(journal_path, 'r') as f:
+        journal = json.load(f)
+
+    # Root element of JUnit XML
+    testsuites = Element('testsuites')
+    chaos_journal_testsuite(journal, testsuites)
 
     # Write JUnit XML to file
     tree = ElementTree(testsuites)
@@ -77,14 +144,121 @@ def load_test_definition(json_path):
     return services
 
 
+def sketch_index(value):
+    return 0 if value < 1 else math.ceil(math.log(value) / math.log(SKETCH_GAMMA))
+
+
+def sketch_percentile(sketch, pct):
+    """
+    Approximate percentile of a {bucket index: count} sketch.
+    """
+    total = sum(sketch.values())
+    if not total:
+        return 0.0
+    rank = (total - 1) * pct / 100
+    seen = 0
+    for index in sorted(sketch):
+        seen += sketch[index]
+        if seen > rank:
+            return 0.0 if index == 0 else 2 * SKETCH_GAMMA ** index / (SKETCH_GAMMA + 1)
+    return 0.0
+
+
+def parse_timestamp_ms(value, cache):
+    # Epoch milliseconds, or yyyy-MM-dd'T'HH:mm:ss.SSSZ as set in the test definitions' save format;
+    # None for any other timestamp_format (time-based metrics are then left out)
+    if value.isdigit():
+        return int(value)
+    key = value[:19] + value[23:]
+    if key not in cache:
+        try:
+            cache[key] = int(datetime.strptime(key, '%Y-%m-%dT%H:%M:%S%z').timestamp()) * 1000
+        except ValueError:
+            cache[key] = None
+    millis = value[20:23]
+    if cache[key] is None or not millis.isdigit():
+        return None
+    return cache[key] + int(millis)
+
+
+@lru_cache(maxsize=4096)  # repeated messages are normalized once
+def error_signature(code, message):
+    message = SIGNATURE_PATTERN.sub(lambda m: f"<{m.lastgroup}>", message)
+    message = ' '.join(message.split())
+    if len(message) > SIGNATURE_MAX_LENGTH:
+        message = message[:SIGNATURE_MAX_LENGTH] + '...'
+    return f"{code}: {message}"
+
+
+class ErrorSignatures:
+    """
+    Heavy hitters of error signatures (Space-Saving): at most 'capacity' signatures are
+    kept; a new signature replaces the least frequent one and inherits its count as the
+    possible overestimate ('error'). Any signature seen more than total/capacity times is
+    guaranteed to be kept, whatever the number of distinct messages.
+    """
+
+    def __init__(self, capacity=ERROR_SIGNATURES_TRACKED):
+        self.capacity = capacity
+        self.total = 0
+        self.entries = {}  # signature -> [count, error, first_ms, last_ms]
+
+    def add(self, signature, ts=None):
+        self.total += 1
+        entry = self.entries.get(signature)
+        if entry is None:
+            if len(self.entries) < self.capacity:
+                entry = self.entries[signature] = [0, 0, ts, ts]
+            else:
+                evicted = min(self.entries, key=lambda s: self.entries[s][0])
+                floor = self.entries.pop(evicted)[0]
+                entry = self.entries[signature] = [floor, floor, ts, ts]
+        entry[0] += 1
+        if ts is not None:
+            entry[2] = ts if entry[2] is None else min(entry[2], ts)
+            entry[3] = ts if entry[3] is None else max(entry[3], ts)
+
+    def top(self, k=ERROR_SIGNATURES_TOP):
+        """
+        Returns [(signature, count, error, first_ms, last_ms)], most frequent first.
+        """
+        ranked = sorted(self.entries.items(), key=lambda item: (-item[1][0], item[0]))[:k]
+        return [(signature, *entry) for signature, entry in ranked]
+
+
+def _format_ms(ms):
+    return datetime.utcfromtimestamp(ms / 1000).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z' if ms is not None else '-'
+
+
+def format_error_signatures(signatures, k=ERROR_SIGNATURES_TOP):
+    lines = []
+    shown = 0
+    for signature, count, error, first_ms, last_ms in signatures.top(k):
+        if count - error <= error:
+            continue  # mostly counts inherited from evicted signatures: not a reliable heavy hitter
+        if error:
+            # Tracked only since it replaced an evicted signature: the count may include up to 'error' others
+            lines.append(f"{count - error}-{count}x {signature} (first {_format_ms(first_ms)} or earlier, last {_format_ms(last_ms)})")
+        else:
+            lines.append(f"{count}x {signature} (first {_format_ms(first_ms)}, last {_format_ms(last_ms)})")
+        shown += count - error
+    if signatures.total > shown:
+        lines.append(f"... {signatures.total - shown} other failures")
+    return "\n".join(lines)
+
+
 def analyze_jmeter_csv(csv_file_path, services):
     grouped = defaultdict(lambda: {
         "total_time_ms": 0.0,
         "failures": 0,
         "count": 0,
         "label": "",
-        "failures_set": set()
+        "errors": ErrorSignatures(),
+        "sketch": Counter(),
+        "first_ms": None,
+        "last_ms": None
     })
+    cache = {}
 
     # Read CSV and group by label (which should be the URL)
     with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
@@ -96,17 +270,132 @@ def analyze_jmeter_csv(csv_file_path, services):
             grouped[label]["total_time_ms"] += time_ms
             grouped[label]["count"] += 1
             grouped[label]["label"] = label
+            grouped[label]["sketch"][sketch_index(time_ms)] += 1
+            ts = parse_timestamp_ms(row["timeStamp"], cache) if row.get("timeStamp") else None
+            if ts is not None:
+                first, last = grouped[label]["first_ms"], grouped[label]["last_ms"]
+                grouped[label]["first_ms"] = ts if first is None else min(first, ts)
+                grouped[label]["last_ms"] = ts if last is None else max(last, ts)
             if not success:
                 grouped[label]["failures"] += 1
-                grouped[label]["failures_set"].add(
-                    (row.get("responseCode", "Error"), row.get("responseMessage", "No message"))
+                grouped[label]["errors"].add(
+                    error_signature(row.get("responseCode") or "Error", row.get("responseMessage") or "No message"), ts
                 )
 
     return grouped
 
-def convert_jmeter_csv_with_sla(csv_file_path, test_definition_path, junit_output_path):
+def summarize(grouped):
+    """
+    Compact per-label summary of a run: throughput, error rate and latency sketch/percentiles.
+    """
+    firsts = [d["first_ms"] for d in grouped.values() if d["first_ms"] is not None]
+    lasts = [d["last_ms"] for d in grouped.values() if d["last_ms"] is not None]
+    # Throughput is unknown (None) when no timeStamp could be parsed
+    duration_s = max(1.0, (max(lasts) - min(firsts)) / 1000) if firsts else None
+    summaries = {}
+    for label, data in grouped.items():
+        count = data["count"]
+        summaries[label] = {
+            "count": count,
+            "pct_errors": 100 * data["failures"] / count if count else 0,
+            "throughput": count / duration_s if duration_s else None,
+            "mean": data["total_time_ms"] / count if count else 0,
+            "p50": sketch_percentile(data["sketch"], 50),
+            "p90": sketch_percentile(data["sketch"], 90),
+            "p99": sketch_percentile(data["sketch"], 99),
+            "sketch": {str(k): v for k, v in sorted(data["sketch"].items())}
+        }
+    return summaries
+
+def open_baseline_store(path=BASELINE_STORE):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS run_summaries (
+            baseline_key TEXT NOT NULL,
+            run_id TEXT NOT NULL,
+            label TEXT NOT NULL,
+            created TEXT NOT NULL,
+            passed INTEGER NOT NULL,
+            summary TEXT NOT NULL,
+            PRIMARY KEY (baseline_key, run_id, label)
+        )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_run_summaries_label ON run_summaries (baseline_key, label, created)")
+    return conn
+
+def load_baseline(conn, baseline_key, label, run_id, since="", runs=BASELINE_RUNS):
+    # Rolling baseline: the most recent passing runs of the same test and label stored since 'since'
+    rows = conn.execute(
+        "SELECT summary FROM run_summaries WHERE baseline_key = ? AND label = ? AND run_id <> ? AND passed = 1 "
+        "AND created >= ? ORDER BY created DESC LIMIT ?",
+        (baseline_key, label, run_id, since, runs)
+    ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+def save_summaries(conn, baseline_key, run_id, summaries, failed_labels):
+    created = datetime.now().isoformat()
+    conn.executemany(
+        "INSERT OR REPLACE INTO run_summaries VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (baseline_key, run_id, label, created, int(label not in failed_labels), json.dumps(summary))
+            for label, summary in summaries.items()
+        ]
+    )
+    conn.commit()
+
+def load_baseline_since(json_path):
+    with open(json_path, 'r', encoding='utf-8') as f:
+        test_def = json.load(f)
+    return str(test_def.get("test", {}).get("performance", {}).get("baseline_since") or BASELINE_SINCE)
+
+def _format_rate(value):
+    return f"{value:.2f} req/s" if value is not None else "unknown (no timestamps)"
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+def detect_regressions(summary, baseline):
+    """
+    Compare a label's summary with its baseline runs. A metric regresses when it is worse than the
+    baseline median by more than REGRESSION_TOLERANCE_PCT and its robust z-score (distance from the
+    median in scaled MADs) exceeds REGRESSION_Z.
+    """
+    if len(baseline) < BASELINE_MIN_RUNS:
+        return []
+    reasons = []
+    # (metric, description, unit, +1 if higher is worse / -1 if lower is worse)
+    for metric, description, unit, direction in (
+        ("p50", "Median response time", "ms", 1),
+        ("p90", "p90 response time", "ms", 1),
+        ("throughput", "Throughput", "req/s", -1)
+    ):
+        history = [run[metric] for run in baseline if run.get(metric) is not None]
+        if summary[metric] is None or len(history) < BASELINE_MIN_RUNS:
+            continue
+        median = _median(history)
+        if not median:
+            continue
+        change_pct = 100 * direction * (summary[metric] - median) / median
+        mad = 1.4826 * _median([abs(v - median) for v in history])
+        z = direction * (summary[metric] - median) / mad if mad else math.inf
+        if change_pct > REGRESSION_TOLERANCE_PCT and z > REGRESSION_Z:
+            reasons.append(
+                f"{description} {summary[metric]:.2f}{unit} regressed {change_pct:.1f}% from baseline "
+                f"{median:.2f}{unit} ({len(baseline)} runs)"
+            )
+    return reasons
+
+def convert_jmeter_csv_with_sla(csv_file_path, test_definition_path, junit_output_path, run_id=None, baseline_key=None):
     services = load_test_definition(test_definition_path)
     grouped = analyze_jmeter_csv(csv_file_path, services)
+    summaries = summarize(grouped)
+    if grouped and all(data["first_ms"] is None for data in grouped.values()):
+        print("[WARN] timeStamp format not recognized (expected epoch ms or yyyy-MM-dd'T'HH:mm:ss.SSSZ), "
+              "throughput and time-based checks are skipped")
+    baseline_since = load_baseline_since(test_definition_path)
+    conn = open_baseline_store() if run_id and baseline_key else None
+    failed_labels = set()
 
     testsuite = Element("testsuite")
     testsuite.set("name", "JMeter Results with SLA Evaluation")
@@ -150,13 +439,15 @@ def convert_jmeter_csv_with_sla(csv_file_path, test_definition_path, junit_outpu
             if fail_reason:
                 sla_failures.append(fail_reason)
 
+        baseline = load_baseline(conn, baseline_key, label, run_id, baseline_since) if conn else []
+        sla_failures.extend(detect_regressions(summaries[label], baseline))
+
         if sla_failures:
             failures += 1
+            failed_labels.add(label)
             failure = SubElement(testcase, "failure")
             failure.set("message", " | ".join(sla_failures))
-            failure.text = "\n".join(
-                f"{code}: {msg}" for code, msg in data["failures_set"]
-            )
+            failure.text = format_error_signatures(data["errors"])
 
         sysout = SubElement(testcase, "system-out")
         if sla_defs and len(sla_defs) > 0:
@@ -169,7 +460,17 @@ def convert_jmeter_csv_with_sla(csv_file_path, test_definition_path, junit_outpu
             f"Error Percentage: {pct_errors:.2f}%\n"
             f"Average Duration: {avg_time:.2f} ms\n"
             f"SLAs checked: {sla_checked}\n"
+            f"Throughput: {_format_rate(summaries[label]['throughput'])}\n"
+            f"Percentiles: p50={summaries[label]['p50']:.0f} ms, p90={summaries[label]['p90']:.0f} ms, "
+            f"p99={summaries[label]['p99']:.0f} ms\n"
         )
+        if len(baseline) >= BASELINE_MIN_RUNS:
+            rates = [b["throughput"] for b in baseline if b.get("throughput") is not None]
+            sysout.text += (
+                f"Baseline ({len(baseline)} runs{f' since {baseline_since}' if baseline_since else ''}): "
+                f"p90={_median([b['p90'] for b in baseline]):.0f} ms, "
+                f"throughput={_format_rate(_median(rates) if rates else None)}\n"
+            )
         total += 1
 
     testsuite.set("tests", str(total))
@@ -181,16 +482,206 @@ def convert_jmeter_csv_with_sla(csv_file_path, test_definition_path, junit_outpu
     tree.write(junit_output_path, encoding="utf-8", xml_declaration=True)
     print(f"JUnit XML written to: {junit_output_path}")
 
+    if conn:
+        save_summaries(conn, baseline_key, str(run_id), summaries, failed_labels)
+        conn.close()
+
+
+def journal_activities(journal):
+    """
+    Activities of the journal run with their start/end in epoch milliseconds, in start order.
+    """
+    activities = []
+    for step in journal.get('run', []):
+        if step.get('start') and step.get('end'):
+            activities.append({
+                "name": activity_name(step),
+                "start_ms": journal_time_ms(step['start']),
+                "end_ms": journal_time_ms(step['end']),
+                "status": step.get('status', '')
+            })
+    return sorted(activities, key=lambda a: a["start_ms"])
+
+
+def _window_stats():
+    return {"count": 0, "failures": 0, "sketch": Counter()}
+
+
+def correlate_chaos_activities(csv_file_path, activities):
+    """
+    Interval join of the JMeter samples with the windows around every activity, in one pass
+    over the CSV (samples may come in any order, e.g. merged from several workers).
+
+    Returns:
+        per activity: {"before": stats, "during": stats, "after": [stats per CHAOS_BUCKET_SECONDS bucket]}
+    """
+    bucket_ms = CHAOS_BUCKET_SECONDS * 1000
+    buckets = max(1, CHAOS_RECOVERY_SECONDS // CHAOS_BUCKET_SECONDS)
+    windows = []  # (from_ms, to_ms, stats)
+    impact = []
+    for activity in activities:
+        start, end = activity["start_ms"], max(activity["end_ms"], activity["start_ms"] + 1)
+        phases = {"before": _window_stats(), "during": _window_stats(), "after": [_window_stats() for _ in range(buckets)]}
+        windows.append((start - CHAOS_BASELINE_SECONDS * 1000, start, phases["before"]))
+        windows.append((start, end, phases["during"]))
+        for i, stats in enumerate(phases["after"]):
+            windows.append((end + i * bucket_ms, end + (i + 1) * bucket_ms, stats))
+        impact.append(phases)
+
+    # Elementary segments between consecutive window bounds, each with the windows covering it,
+    # so every sample is matched with one binary search
+    bounds = sorted({w[0] for w in windows} | {w[1] for w in windows})
+    covering = [[] for _ in bounds]
+    for lo, hi, stats in windows:
+        for i in range(bisect.bisect_left(bounds, lo), bisect.bisect_left(bounds, hi)):
+            covering[i].append(stats)
+
+    cache = {}
+    with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if not row.get("timeStamp"):
+                continue
+            ts = parse_timestamp_ms(row["timeStamp"], cache)
+            if ts is None:
+                continue
+            i = bisect.bisect_right(bounds, ts) - 1
+            if i < 0 or not covering[i]:
+                continue
+            index = sketch_index(float(row.get("elapsed", "0")))
+            failed = row.get("success", "true").lower() != "true"
+            for stats in covering[i]:
+                stats["count"] += 1
+                stats["failures"] += failed
+                stats["sketch"][index] += 1
+    return impact
+
+
+def _error_pct(stats):
+    return 100 * stats["failures"] / stats["count"] if stats["count"] else 0.0
+
+
+def recovery_seconds(phases, thresholds):
+    """
+    Seconds after the activity ended until CHAOS_STABLE_BUCKETS consecutive buckets had samples,
+    an error rate within max_error_pct and (with a baseline) p90 within max_p90_increase_pct of it.
+    None if that didn't happen within CHAOS_RECOVERY_SECONDS.
+    """
+    baseline_p90 = sketch_percentile(phases["before"]["sketch"], 90) if phases["before"]["count"] else None
+    healthy = [
+        stats["count"] > 0
+        and _error_pct(stats) <= thresholds["max_error_pct"]
+        and (baseline_p90 is None
+             or sketch_percentile(stats["sketch"], 90) <= baseline_p90 * (1 + thresholds["max_p90_increase_pct"] / 100))
+        for stats in phases["after"]
+    ]
+    for i in range(len(healthy) - CHAOS_STABLE_BUCKETS + 1):
+        if all(healthy[i:i + CHAOS_STABLE_BUCKETS]):
+            return i * CHAOS_BUCKET_SECONDS
+    return None
+
+
+def _phase_line(name, stats):
+    if not stats["count"]:
+        return f"{name}: no samples"
+    return (
+        f"{name}: {stats['count']} samples, errors {_error_pct(stats):.2f}%, "
+        f"p50={sketch_percentile(stats['sketch'], 50):.0f} ms, p90={sketch_percentile(stats['sketch'], 90):.0f} ms, "
+        f"p99={sketch_percentile(stats['sketch'], 99):.0f} ms"
+    )
+
+
+def chaos_impact_testsuite(activities, impact, thresholds, testsuites):
+    testsuite = SubElement(testsuites, "testsuite")
+    testsuite.set("name", "Chaos Impact on JMeter Results")
+    total = failures = skipped = 0
+
+    for activity, phases in zip(activities, impact):
+        before, during = phases["before"], phases["during"]
+        duration = max(0, activity["end_ms"] - activity["start_ms"]) / 1000
+        recovery = recovery_seconds(phases, thresholds)
+        summary = "\n".join([
+            f"Activity: {activity['name']} ({_format_ms(activity['start_ms'])} - {_format_ms(activity['end_ms'])}, {activity['status']})",
+            _phase_line(f"Before ({CHAOS_BASELINE_SECONDS}s)", before),
+            _phase_line("During", during),
+            f"Recovery: {f'{recovery}s after the activity' if recovery is not None else f'not within {CHAOS_RECOVERY_SECONDS}s'}",
+            f"Thresholds: {', '.join(f'{k}={v}' for k, v in thresholds.items())}"
+        ]) + "\n"
+
+        checks = []
+        if not during["count"] or not before["count"]:
+            checks.append(("latency", None, "No JMeter samples before or during the activity"))
+        else:
+            before_p90, during_p90 = sketch_percentile(before["sketch"], 90), sketch_percentile(during["sketch"], 90)
+            increase = 100 * (during_p90 - before_p90) / before_p90 if before_p90 else 0.0
+            checks.append(("latency", increase <= thresholds["max_p90_increase_pct"],
+                           f"p90 {before_p90:.0f} ms -> {during_p90:.0f} ms ({increase:+.1f}%), "
+                           f"limit +{thresholds['max_p90_increase_pct']}%"))
+        if not during["count"]:
+            checks.append(("error rate", None, "No JMeter samples during the activity"))
+        else:
+            checks.append(("error rate", _error_pct(during) <= thresholds["max_error_pct"],
+                           f"Error rate during the activity {_error_pct(during):.2f}%, limit {thresholds['max_error_pct']}%"))
+        checks.append(("recovery", recovery is not None and recovery <= thresholds["max_recovery_seconds"],
+                       f"Recovered {recovery}s after the activity, limit {thresholds['max_recovery_seconds']}s"
+                       if recovery is not None else f"Not recovered within {CHAOS_RECOVERY_SECONDS}s"))
+
+        for check, passed, message in checks:
+            testcase = SubElement(testsuite, "testcase")
+            testcase.set("name", f"{activity['name']}: {check}")
+            testcase.set("classname", "Chaos")
+            testcase.set("time", f"{duration:.3f}")
+            if passed is None:
+                SubElement(testcase, "skipped").set("message", message)
+                skipped += 1
+            elif not passed:
+                SubElement(testcase, "failure").set("message", message)
+                failures += 1
+            SubElement(testcase, "system-out").text = summary
+            total += 1
+
+    testsuite.set("tests", str(total))
+    testsuite.set("failures", str(failures))
+    testsuite.set("errors", "0")
+    testsuite.set("skipped", str(skipped))
+    return testsuite
+
+
+def convert_chaos_with_jmeter(journal_path, test_definition_path, junit_path, csv_file_path):
+    """
+    JUnit report of a resilience run combining the journal's activities with the impact each
+    one had on the JMeter samples recorded meanwhile (latency, error rate, recovery time).
+    """
+    with open(journal_path, 'r') as f:
+        journal = json.load(f)
+    thresholds = dict(CHAOS_THRESHOLDS)
+    if test_definition_path and os.path.exists(test_definition_path):
+        with open(test_definition_path, 'r', encoding='utf-8') as f:
+            definition = json.load(f)
+        configured = definition.get("test", {}).get("resilience", {}).get("thresholds", {})
+        thresholds.update({k: float(v) for k, v in configured.items() if k in CHAOS_THRESHOLDS})
+
+    activities = journal_activities(journal)
+    impact = correlate_chaos_activities(csv_file_path, activities)
+
+    testsuites = Element('testsuites')
+    chaos_journal_testsuite(journal, testsuites)
+    chaos_impact_testsuite(activities, impact, thresholds, testsuites)
+    ElementTree(testsuites).write(junit_path, encoding='utf-8', xml_declaration=True)
+    print(f"JUnit XML written to: {junit_path}")
+
 if __name__ == "__main__":
-    if len(sys.argv) != 5:
-        print("Usage: ./convert2junit.py [json|csv] <input_file> <test_definition.json> <output_junit.xml>")
+    if len(sys.argv) not in (5, 6, 7) or (len(sys.argv) == 6) != (sys.argv[1] == 'chaos'):
+        print("Usage: ./convert2junit.py [json|csv] <input_file> <test_definition.json> <output_junit.xml> [<run_id> <baseline_key>]")
+        print("       ./convert2junit.py chaos <journal.json> <test_definition.json> <output_junit.xml> <results.jtl>")
         sys.exit(1)
 
     if sys.argv[1] == 'json':
         convert_chaos_journal_to_junit(sys.argv[2], sys.argv[4])
     elif sys.argv[1] == 'csv':
-        convert_jmeter_csv_with_sla(sys.argv[2], sys.argv[3], sys.argv[4])
+        convert_jmeter_csv_with_sla(sys.argv[2], sys.argv[3], sys.argv[4], *sys.argv[5:])
+    elif sys.argv[1] == 'chaos':
+        convert_chaos_with_jmeter(sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5])
     else:
         print(f"Unsupported format: {sys.argv[1]}")
-        print("Only json or csv formats are supported.")
+        print("Only json, csv or chaos formats are supported.")
         sys.exit(1)
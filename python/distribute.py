@@ -0,0 +1,183 @@
+#!/usr/bin/python
+# Pushes test artifacts to, and pulls results from, all worker servers concurrently over ssh.
+#
+# Files are content-addressed: each worker keeps a cache (~/.ptp-artifacts) of files by SHA-256,
+# only files missing from a worker's cache are sent (as one gzip tar stream per worker) and the
+# test directory is then populated with hard links from the cache. Results are pulled back as one
+# gzip tar stream per worker and saved as <file>-<server>.
+#
+# Usage:
+#   ./distribute.py push <ssh_user> <servers> <remote_dir> <local_file>[=<remote_name>] ...
+#   ./distribute.py pull <ssh_user> <servers> <remote_dir> <local_dir> <remote_file> ...
+#
+#   servers     comma-separated worker servers
+#   local_file  may contain {i}, replaced by the worker index (00, 01, ...) to send each worker its own
+#               file, e.g. "split-test-data.csv-data-{i}=test-data.csv"
+#
+# Environment:
+#   MAX_PARALLEL        Maximum workers handled at the same time (default 16)
+#   CACHE_RETENTION_DAYS  Cached artifacts unused for longer than this are removed (default 7)
+
+import hashlib
+import os
+import shlex
+import subprocess
+import sys
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_PARALLEL = int(os.environ.get("MAX_PARALLEL", "16"))
+CACHE_RETENTION_DAYS = int(os.environ.get("CACHE_RETENTION_DAYS", "7"))
+CACHE_DIR = ".ptp-artifacts"  # relative to the ssh user's home
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ssh(user, server, command, stdin=None):
+    return subprocess.Popen(
+        ['ssh', '-q', f'{user}@{server}', command],
+        stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+
+def _check(process):
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode(errors='replace').strip() or f"exit code {process.returncode}")
+    return stdout
+
+
+def push_server(user, server, remote_dir, files, hashes):
+    """
+    files: [(local_path, remote_name)] for this server; hashes: {local_path: sha256}
+    Returns the number of files actually transferred.
+    """
+    wanted = sorted({hashes[local] for local, _ in files})
+
+    # Which artifacts the worker already has (touching them keeps them in the cache)
+    query = (
+        f"mkdir -p {CACHE_DIR} && cd {CACHE_DIR} && "
+        f"find . -type f -mtime +{CACHE_RETENTION_DAYS} -delete; "
+        f"for h in {' '.join(wanted)}; do [ -f $h ] && touch $h && echo $h; done; true"
+    )
+    present = set(_check(ssh(user, server, query)).decode().split())
+    missing = {}
+    for local, _ in files:
+        if hashes[local] not in present:
+            missing[hashes[local]] = local
+
+    directory = shlex.quote(remote_dir)
+    link = ' && '.join(
+        f"{{ ln -f {CACHE_DIR}/{hashes[local]} {directory}/{shlex.quote(name)} 2>/dev/null || "
+        f"cp -f {CACHE_DIR}/{hashes[local]} {directory}/{shlex.quote(name)}; }}"
+        for local, name in files
+    )
+    command = f"rm -rf {directory} && mkdir -p {directory}" + (f" && {link}" if link else "")
+    if not missing:
+        _check(ssh(user, server, command))
+        return 0
+
+    # Missing artifacts go as one compressed tar stream, named by hash, straight into the cache
+    process = ssh(user, server, f"tar -xzf - -C {CACHE_DIR} && {command}", stdin=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=process.stdin, mode='w|gz') as tar:
+            for digest, local in sorted(missing.items()):
+                tar.add(local, arcname=digest)
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    process.stdin = None
+    _check(process)
+    return len(missing)
+
+
+def pull_server(user, server, remote_dir, local_dir, names):
+    """
+    Fetch the files that exist in remote_dir as <local_dir>/<name>-<server>.
+    Returns the names received.
+    """
+    command = (
+        f"cd {shlex.quote(remote_dir)} && "
+        f"tar -czf - --ignore-failed-read {' '.join(shlex.quote(n) for n in names)} 2>/dev/null; true"
+    )
+    process = ssh(user, server, command)
+    received = []
+    try:
+        with tarfile.open(fileobj=process.stdout, mode='r|gz') as tar:
+            for member in tar:
+                if not member.isfile() or member.name not in names:
+                    continue
+                with tar.extractfile(member) as source, open(os.path.join(local_dir, f"{member.name}-{server}"), 'wb') as target:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        target.write(chunk)
+                received.append(member.name)
+    except tarfile.ReadError:
+        # Nothing readable came back; report the ssh error if there is one
+        _check(process)
+        raise RuntimeError("no results archive received")
+    _check(process)
+    return received
+
+
+def push(user, servers, remote_dir, specs, max_parallel=MAX_PARALLEL):
+    per_server = []
+    for i, server in enumerate(servers):
+        files = []
+        for spec in specs:
+            local, _, name = spec.partition('=')
+            local = local.replace('{i}', f"{i:02d}")
+            files.append((local, name or os.path.basename(local)))
+        per_server.append(files)
+
+    # Each distinct file is hashed once, however many workers receive it
+    hashes = {}
+    for files in per_server:
+        for local, _ in files:
+            if local not in hashes:
+                hashes[local] = file_hash(local)
+
+    return _run_all(servers, max_parallel, lambda i, server: push_server(user, server, remote_dir, per_server[i], hashes))
+
+
+def pull(user, servers, remote_dir, local_dir, names, max_parallel=MAX_PARALLEL):
+    return _run_all(servers, max_parallel, lambda i, server: pull_server(user, server, remote_dir, local_dir, names))
+
+
+def _run_all(servers, max_parallel, task):
+    results, failures = {}, []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(servers)))) as executor:
+        futures = {server: executor.submit(task, i, server) for i, server in enumerate(servers)}
+        for server, future in futures.items():
+            try:
+                results[server] = future.result()
+            except Exception as e:
+                failures.append(f"{server}: {e}")
+    return results, failures
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 6 or sys.argv[1] not in ('push', 'pull') or (sys.argv[1] == 'pull' and len(sys.argv) < 7):
+        print("Usage: ./distribute.py push <ssh_user> <servers> <remote_dir> <local_file>[=<remote_name>] ...")
+        print("       ./distribute.py pull <ssh_user> <servers> <remote_dir> <local_dir> <remote_file> ...")
+        sys.exit(1)
+
+    action, user, servers, remote_dir = sys.argv[1], sys.argv[2], sys.argv[3].split(','), sys.argv[4]
+    if action == 'push':
+        results, failures = push(user, servers, remote_dir, sys.argv[5:])
+        for server, sent in results.items():
+            print(f"[INFO] {server}: {sent} file(s) sent, the rest already cached")
+    else:
+        results, failures = pull(user, servers, remote_dir, sys.argv[5], sys.argv[6:])
+        for server, received in results.items():
+            print(f"[INFO] {server}: received {', '.join(received) or 'nothing'}")
+
+    for failure in failures:
+        print(f"[ERROR] {failure}")
+    sys.exit(1 if failures else 0)
@@ -2,12 +2,57 @@ import requests
 import json
 import logging
 import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from configuration import user_key, dashboard_guid
 
+# NerdGraph endpoint, point it to a local mock server for testing
+NERDGRAPH_URL = os.environ.get("NERDGRAPH_URL", "https://api.newrelic.com/graphql")
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "4"))
+EXPORT_RETRIES = int(os.environ.get("EXPORT_RETRIES", "3"))
+OUTPUT_DIR = os.environ.get("OUTPUT_DIR", ".")
+CHUNK_SIZE = 64 * 1024
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def get_dashboard_page_guid(key, dashboard_guid):
+
+def create_session(key, workers=EXPORT_WORKERS, retries=EXPORT_RETRIES):
+    # Pooled session shared by all exports; transient failures are retried with exponential backoff.
+    # Without a key it carries no API-Key header (snapshot downloads go to pre-signed URLs off New Relic)
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # retry the GraphQL POSTs too
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if key:
+        session.headers.update({'API-Key': f'{key}'})
+    session.verify = False
+    return session
+
+
+def nerdgraph(session, query):
+    response = session.post(NERDGRAPH_URL, json={"query": query}, timeout=60)
+    if response.status_code != 200:
+        logging.error(f"Error in response: {response.content}")
+        raise Exception(f'Nerdgraph query failed with status code {response.status_code}.')
+    json_dictionary = json.loads(response.content)
+    if json_dictionary.get("errors"):
+        logging.error(f"Error in response: {json_dictionary}")
+        raise Exception(f"Nerdgraph query failed: {json_dictionary['errors']}")
+    return json_dictionary["data"]
+
+
+def get_dashboard_pages(session, dashboard_guid):
     query = """
     {
       actor {
@@ -24,55 +69,77 @@ def get_dashboard_page_guid(key, dashboard_guid):
       }
     }
     """ % dashboard_guid
-    
-    endpoint = "https://api.newrelic.com/graphql"
-    headers = {'API-Key': f'{key}'}
-    response = requests.post(endpoint, headers=headers, json={"query": query}, verify=False)
-    
-    if response.status_code == 200:
-        json_dictionary = json.loads(response.content)
-        pages = json_dictionary["data"]["actor"]["entity"]["pages"]
-        if pages:
-            return pages[0]["guid"]  # Return the GUID of the first page
-        else:
-            logging.error("No pages found in the dashboard.")
-            raise Exception("No pages found in the dashboard.")
-    else:
-        logging.error(f'Failed to fetch dashboard pages with status code {response.status_code}.')
-        raise Exception(f'Failed to fetch dashboard pages with status code {response.status_code}.')
-
-def nerdgraph_dashboards(key, page_guid):
+
+    entity = nerdgraph(session, query)["actor"]["entity"]
+    if not entity or not entity.get("pages"):
+        logging.error(f"No pages found in the dashboard {dashboard_guid}.")
+        raise Exception(f"No pages found in the dashboard {dashboard_guid}.")
+    return entity["name"], entity["pages"]
+
+
+def nerdgraph_dashboards(session, downloads, page_guid, filename):
     query = """
     mutation {
       dashboardCreateSnapshotUrl(guid: "%s")
     }
     """ % page_guid
-    
-    endpoint = "https://api.newrelic.com/graphql"
-    headers = {'API-Key': f'{key}'}
-    response = requests.post(endpoint, headers=headers, json={"query": query}, verify=False)
-
-    if response.status_code == 200:
-        json_dictionary = json.loads(response.content)
-        if "data" in json_dictionary and json_dictionary["data"]["dashboardCreateSnapshotUrl"]:
-            url_pdf = json_dictionary["data"]["dashboardCreateSnapshotUrl"]
-            logging.info(f'Snapshot URL: {url_pdf}')
-
-            # Download and save the PDF file
-            dashboard_response = requests.get(url_pdf, stream=True, verify=False)
-            with open('Test-Execution-Dashboard.pdf', 'wb') as file:
-                file.write(dashboard_response.content)
-            logging.info('Dashboard PDF saved successfully.')
-        else:
-            logging.error(f"Error in response: {json_dictionary}")
-            raise Exception("Failed to create snapshot URL.")
-    else:
-        logging.error(f"Error in response: {response.content}")
-        raise Exception(f'Nerdgraph query failed with status code {response.status_code}.')
+
+    url_pdf = nerdgraph(session, query).get("dashboardCreateSnapshotUrl")
+    if not url_pdf:
+        raise Exception(f"Failed to create snapshot URL for page {page_guid}.")
+    logging.info(f'Snapshot URL: {url_pdf}')
+
+    # Stream the PDF to disk instead of holding it in memory
+    with downloads.get(url_pdf, stream=True, timeout=300) as dashboard_response:
+        dashboard_response.raise_for_status()
+        with open(filename, 'wb') as file:
+            for chunk in dashboard_response.iter_content(chunk_size=CHUNK_SIZE):
+                file.write(chunk)
+    logging.info(f'Dashboard PDF saved to {filename}.')
+    return filename
+
+
+def pdf_filename(dashboard_name, page_name, single):
+    # A single page keeps the historical file name
+    if single:
+        return os.path.join(OUTPUT_DIR, 'Test-Execution-Dashboard.pdf')
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', f"{dashboard_name}-{page_name}").strip('-')
+    return os.path.join(OUTPUT_DIR, f'Test-Execution-Dashboard-{slug}.pdf')
+
+
+def export_dashboards(key, dashboard_guids, workers=EXPORT_WORKERS):
+    """
+    Export every page of every dashboard to PDF concurrently.
+    Returns the list of files written; raises if any export failed.
+    """
+    session = create_session(key, workers)
+    downloads = create_session(None, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        dashboards = list(executor.map(lambda guid: get_dashboard_pages(session, guid), dashboard_guids))
+        pages = [(name, page) for name, dashboard_pages in dashboards for page in dashboard_pages]
+        futures = [
+            executor.submit(nerdgraph_dashboards, session, downloads, page["guid"], pdf_filename(name, page["name"], len(pages) == 1))
+            for name, page in pages
+        ]
+        files, failures = [], []
+        for (name, page), future in zip(pages, futures):
+            try:
+                files.append(future.result())
+            except Exception as e:
+                logging.error(f"Failed to export page '{page['name']}' of '{name}': {e}")
+                failures.append(page["guid"])
+    session.close()
+    downloads.close()
+    if failures:
+        raise Exception(f"{len(failures)} of {len(pages)} dashboard pages failed to export.")
+    return files
+
 
 if __name__ == "__main__":
+    # Dashboard GUIDs from the command line, or the configured one(s)
+    guids = sys.argv[1:] or ([dashboard_guid] if isinstance(dashboard_guid, str) else list(dashboard_guid))
     try:
-        page_guid = get_dashboard_page_guid(user_key, dashboard_guid)
-        nerdgraph_dashboards(user_key, page_guid)
+        export_dashboards(user_key, guids)
     except Exception as e:
         logging.error(f'An error occurred: {e}')
+        sys.exit(1)
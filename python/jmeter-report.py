@@ -0,0 +1,257 @@
+#!/usr/bin/python
+# Offline JMeter report: per-second throughput, latency percentiles and errors per label,
+# rendered as a single self-contained HTML file (inline SVG charts, no external assets).
+#
+# Reads the same results.jtl (CSV) that convert2junit.py evaluates; the output only depends
+# on its content, so re-running on the same file produces the same report.
+#
+# Usage: ./jmeter-report.py <results.jtl> <report.html> [title]
+
+import csv
+import html
+import sys
+from datetime import datetime
+
+# numpy is optional: aggregation falls back to plain Python (same results) when it is not installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERCENTILES = (50, 90, 99)
+# Charts show the busiest labels only; the summary table lists all of them
+MAX_CHART_LABELS = 10
+# Longer runs are drawn in buckets of several seconds, so soak tests don't produce huge SVGs
+MAX_CHART_POINTS = 600
+COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+          "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf", "#000000")
+
+
+def _epoch_seconds(value, cache):
+    # timeStamp is epoch milliseconds, or yyyy-MM-dd'T'HH:mm:ss.SSSZ with the test definitions' save format
+    if value.isdigit():
+        return int(value) // 1000
+    key = value[:19] + value[23:]  # milliseconds don't change the second
+    if key not in cache:
+        cache[key] = int(datetime.strptime(key, '%Y-%m-%dT%H:%M:%S%z').timestamp())
+    return cache[key]
+
+
+def load_results(csv_file_path):
+    labels, seconds, elapsed, errors = [], [], [], []
+    cache = {}
+    with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            labels.append(row.get("label", "Unnamed"))
+            seconds.append(_epoch_seconds(row.get("timeStamp", "0"), cache))
+            elapsed.append(float(row.get("elapsed", "0")))
+            errors.append(row.get("success", "true").lower() != "true")
+    return labels, seconds, elapsed, errors
+
+
+def _groups_numpy(keys, seconds, elapsed, errors):
+    # One sort, then every statistic is computed per (key, second) group with array operations
+    keys = np.asarray(keys, dtype=np.int64)
+    seconds = np.asarray(seconds, dtype=np.int64)
+    elapsed = np.asarray(elapsed, dtype=np.float64)
+    errors = np.asarray(errors, dtype=np.int64)
+    order = np.lexsort((elapsed, seconds, keys))
+    keys, seconds, elapsed, errors = keys[order], seconds[order], elapsed[order], errors[order]
+
+    new_group = np.empty(len(keys), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = (keys[1:] != keys[:-1]) | (seconds[1:] != seconds[:-1])
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, len(keys)))
+
+    columns = {
+        "key": keys[starts],
+        "second": seconds[starts],
+        "count": counts,
+        "errors": np.add.reduceat(errors, starts),
+        "sum": np.add.reduceat(elapsed, starts)
+    }
+    for pct in PERCENTILES:
+        columns[f"p{pct}"] = elapsed[starts + (counts - 1) * pct // 100]
+    return [dict(zip(columns, values)) for values in zip(*(columns[c].tolist() for c in columns))]
+
+
+def _groups_python(keys, seconds, elapsed, errors):
+    grouped = {}
+    for key, second, value, error in zip(keys, seconds, elapsed, errors):
+        group = grouped.setdefault((key, second), ([], [0]))
+        group[0].append(value)
+        group[1][0] += error
+    rows = []
+    for (key, second), (values, error_count) in sorted(grouped.items()):
+        values.sort()
+        row = {"key": key, "second": second, "count": len(values), "errors": error_count[0], "sum": sum(values)}
+        for pct in PERCENTILES:
+            row[f"p{pct}"] = values[(len(values) - 1) * pct // 100]
+        rows.append(row)
+    return rows
+
+
+def aggregate(labels, seconds, elapsed, errors):
+    """
+    Returns (start_second, names, series, summary):
+        series:  {label: [{second, count, errors, sum, p50, p90, p99}, ...]} per second, seconds relative to start
+        summary: {label: {count, errors, sum, p50, p90, p99}} over the whole run
+    'All' aggregates every label.
+    """
+    if not labels:
+        return 0, [], {}, {}
+    groups = _groups_numpy if np is not None else _groups_python
+    names = sorted(set(labels))
+    index = {name: i for i, name in enumerate(names)}
+    keys = [index[label] for label in labels] + [len(names)] * len(labels)
+    names.append("All")
+    start = min(seconds)
+    relative = [second - start for second in seconds] * 2
+    doubled = (elapsed * 2, errors * 2)
+
+    series = {name: [] for name in names}
+    for row in groups(keys, relative, *doubled):
+        series[names[row.pop("key")]].append(row)
+    summary = {}
+    for row in groups(keys, [0] * len(keys), *doubled):
+        key = row.pop("key")
+        row.pop("second")
+        summary[names[key]] = row
+    return start, names, series, summary
+
+
+def _svg_chart(title, unit, lines, duration):
+    """
+    lines: [(label, color, [(second, value), ...]), ...]
+    """
+    width, height, left, bottom, top = 900, 260, 60, 30, 25
+    plot_w, plot_h = width - left - 10, height - bottom - top
+    peak = max((value for _, _, points in lines for _, value in points), default=0) or 1
+    x = lambda second: left + plot_w * second / max(duration, 1)
+    y = lambda value: top + plot_h * (1 - value / peak)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="11">',
+        f'<text x="{left}" y="15" font-size="13" font-weight="bold">{html.escape(title)}</text>',
+        f'<line x1="{left}" y1="{top + plot_h}" x2="{left + plot_w}" y2="{top + plot_h}" stroke="#999"/>',
+        f'<line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_h}" stroke="#999"/>',
+        f'<text x="{left - 5}" y="{top + 4}" text-anchor="end">{peak:.0f} {unit}</text>',
+        f'<text x="{left - 5}" y="{top + plot_h}" text-anchor="end">0</text>',
+        f'<text x="{left}" y="{height - 8}">0 s</text>',
+        f'<text x="{left + plot_w}" y="{height - 8}" text-anchor="end">{duration} s</text>'
+    ]
+    for label, color, points in lines:
+        coords = ' '.join(f"{x(second):.1f},{y(value):.1f}" for second, value in points)
+        parts.append(
+            f'<polyline fill="none" stroke="{color}" stroke-width="1.2" points="{coords}">'
+            f'<title>{html.escape(label)}</title></polyline>'
+        )
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def _filled(rows, duration, field):
+    # Seconds without samples count as zero throughput / errors
+    values = [0] * (duration + 1)
+    for row in rows:
+        values[row["second"]] = row[field]
+    return list(enumerate(values))
+
+
+def _downsample(points, duration, reduce):
+    # At most MAX_CHART_POINTS per line: each bucket of seconds is drawn at its first second
+    width = -(-(duration + 1) // MAX_CHART_POINTS)
+    if width == 1:
+        return points
+    buckets = {}
+    for second, value in points:
+        buckets.setdefault(second // width, []).append(value)
+    return [(bucket * width, reduce(values)) for bucket, values in sorted(buckets.items())]
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+def render_html(title, start, names, series, summary):
+    duration = max((row["second"] for rows in series.values() for row in rows), default=0)
+    charted = sorted(
+        (name for name in names if name != "All"), key=lambda name: (-summary[name]["count"], name)
+    )[:MAX_CHART_LABELS] + ["All"]
+    colors = {name: COLORS[i % len(COLORS)] for i, name in enumerate(charted)}
+    colors["All"] = COLORS[-1]
+
+    # Rates are averaged over a bucket; response times keep the bucket's worst p90
+    charts = [
+        _svg_chart("Throughput", "req/s", [
+            (name, colors[name], _downsample(_filled(series[name], duration, "count"), duration, _mean))
+            for name in charted
+        ], duration),
+        _svg_chart("p90 response time", "ms", [
+            (name, colors[name], _downsample([(row["second"], row["p90"]) for row in series[name]], duration, max))
+            for name in charted
+        ], duration),
+        _svg_chart("Errors", "err/s", [
+            (name, colors[name], _downsample(_filled(series[name], duration, "errors"), duration, _mean))
+            for name in charted
+        ], duration)
+    ]
+    legend = ' '.join(
+        f'<span style="color:{colors[name]}">&#9632; {html.escape(name)}</span>' for name in charted
+    )
+
+    rows = []
+    for name in sorted(names, key=lambda name: (name == "All", name)):
+        s = summary[name]
+        rows.append(
+            f"<tr><td>{html.escape(name)}</td><td>{s['count']}</td>"
+            f"<td>{s['count'] / (duration + 1):.2f}</td><td>{s['errors']}</td>"
+            f"<td>{100 * s['errors'] / s['count']:.2f}%</td><td>{s['sum'] / s['count']:.1f}</td>"
+            + ''.join(f"<td>{s[f'p{pct}']:.0f}</td>" for pct in PERCENTILES)
+            + "</tr>"
+        )
+    header = ''.join(f"<th>p{pct} (ms)</th>" for pct in PERCENTILES)
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 20px; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+td:first-child, th:first-child {{ text-align: left; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p>Start: {start} (epoch seconds), duration: {duration + 1} s</p>
+<table>
+<tr><th>Label</th><th>Requests</th><th>Avg req/s</th><th>Errors</th><th>Error %</th><th>Avg (ms)</th>{header}</tr>
+{chr(10).join(rows)}
+</table>
+<p>{legend}</p>
+{chr(10).join(charts)}
+</body>
+</html>
+"""
+
+
+def generate_report(csv_file_path, report_path, title="JMeter Results"):
+    start, names, series, summary = aggregate(*load_results(csv_file_path))
+    if not names:
+        raise ValueError(f"No samples found in {csv_file_path}")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(render_html(title, start, names, series, summary))
+    print(f"HTML report written to: {report_path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("Usage: ./jmeter-report.py <results.jtl> <report.html> [title]")
+        sys.exit(1)
+
+    generate_report(sys.argv[1], sys.argv[2], *sys.argv[3:])
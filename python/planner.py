@@ -0,0 +1,168 @@
+#!/usr/bin/python
+# Capacity-aware schedule planner.
+#
+# Loads the schedule files and, for every scheduled workflow, the factor, location and test type
+# from its test-definition.json (workflow names start with LAC.xxxx-TEST.yyyy). It simulates a
+# week of pool occupancy using predicted durations and shifts conflicting entries by the smallest
+# delay that avoids oversubscription, printing the staggered schedule and warnings.
+#
+# Usage: ./planner.py <test_home> <capacity> <schedule_file> [<schedule_file> ...]
+#
+#   test_home  directory holding LAC.xxxx/TEST.yyyy/test-definition.json (e.g. testing/performance)
+#   capacity   pool factor per location, e.g. "on-premise-vm=5.0,azure-vm=2.0"
+#
+# Environment:
+#   DPT_REGISTRY_URL, API_VERSION, PTP_API_KEY  predicted durations from /predict (optional)
+#   DEFAULT_DURATION_MINUTES  duration for tests without a prediction (default 60)
+#   STEP_MINUTES              granularity of the shifts tried (default 5)
+#   MAX_DELAY_MINUTES         largest shift tried (default 180)
+
+import os
+import sys
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timedelta
+
+from scheduler import load_test, parse_schedule, registry_get, DPT_REGISTRY_URL
+
+DEFAULT_DURATION_MINUTES = int(os.environ.get("DEFAULT_DURATION_MINUTES", "60"))
+STEP_MINUTES = int(os.environ.get("STEP_MINUTES", "5"))
+MAX_DELAY_MINUTES = int(os.environ.get("MAX_DELAY_MINUTES", "180"))
+
+# Schedules repeat weekly at most (day-of-month entries are approximated), so one week is simulated
+# and occupancy wraps around its end
+HORIZON_MINUTES = 7 * 24 * 60
+
+
+def predicted_minutes(test):
+    if DPT_REGISTRY_URL:
+        query = urllib.parse.urlencode({"lac": test["lac"], "test": test["test"], "type": test["type"]})
+        try:
+            prediction = registry_get(f"/predict?{query}")
+            seconds = prediction.get("p90_seconds") or prediction.get("median_seconds")
+            if seconds:
+                return max(1, int(round(seconds / 60)))
+        except Exception as e:
+            print(f"[WARN] No prediction for {test['lac']}-{test['test']}: {e}", file=sys.stderr)
+    return DEFAULT_DURATION_MINUTES
+
+
+def occurrences(entry, start):
+    # Minute offsets (from start) of every fire of the entry within the horizon
+    result = []
+    fire = entry.next_fire(start - timedelta(minutes=1))
+    while fire is not None and fire < start + timedelta(minutes=HORIZON_MINUTES):
+        result.append(int((fire - start).total_seconds() // 60))
+        fire = entry.next_fire(fire)
+    return result
+
+
+def shift_fields(entry, delay):
+    """
+    (minutes, hours) fields of the entry delayed by 'delay' minutes, or None
+    when it can't be shifted that far (lists or every-minute entries, or
+    crossing midnight on entries pinned to a day).
+    """
+    if not delay:
+        return entry.minutes, entry.hours
+    if entry.minutes is None or len(entry.minutes) != 1 or (entry.hours is not None and len(entry.hours) != 1):
+        return None
+    hour_carry, minute = divmod(next(iter(entry.minutes)) + delay, 60)
+    if entry.hours is None:
+        # Runs every hour: only the minute within the hour can move
+        return None if hour_carry else ({minute}, None)
+    hour = next(iter(entry.hours)) + hour_carry
+    if hour > 23 and (entry.days is not None or entry.weekdays is not None):
+        return None
+    return {minute}, {hour % 24}
+
+
+def format_field(values):
+    return '%' if values is None else ','.join(str(v) for v in sorted(values))
+
+
+def plan(entries, test_home, capacity):
+    """
+    Returns (lines, warnings): the staggered schedule and the remaining conflicts.
+    """
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start -= timedelta(days=start.weekday())  # simulate from Monday 00:00
+    usage = {location: [0.0] * HORIZON_MINUTES for location in capacity}
+    lines, warnings = [], []
+
+    # Place the largest tests first; they are the hardest to fit
+    jobs = []
+    for entry in entries:
+        test = load_test(test_home, entry.workflow)
+        jobs.append((test["factor"] if test else 0, entry, test))
+    jobs.sort(key=lambda job: -job[0])
+
+    for factor, entry, test in jobs:
+        if test is None or test["location"] not in usage:
+            lines.append(schedule_line(entry, (entry.minutes, entry.hours), 0))
+            if test is not None:
+                warnings.append(f"{entry.workflow}: no capacity given for location '{test['location']}'")
+            continue
+        pool = usage[test["location"]]
+        duration = predicted_minutes(test)
+        # Runs of the entry active at each minute: more than one where a run outlasts the next fire
+        own = Counter((fire + m) % HORIZON_MINUTES for fire in occurrences(entry, start) for m in range(duration))
+        if own and max(own.values()) > 1:
+            warnings.append(
+                f"{entry.workflow}: predicted duration {duration} min is longer than its period, "
+                f"up to {max(own.values())} runs overlap"
+            )
+
+        best = None
+        for delay in range(0, MAX_DELAY_MINUTES + 1, STEP_MINUTES):
+            fields = shift_fields(entry, delay)
+            if fields is None:
+                continue
+            overflow = max(
+                (pool[(minute + delay) % HORIZON_MINUTES] + runs * factor - capacity[test["location"]]
+                 for minute, runs in own.items()),
+                default=0
+            )
+            if best is None or overflow < best[0]:
+                best = (overflow, delay, fields)
+            if overflow <= 1e-9:
+                break
+
+        overflow, delay, fields = best
+        for minute, runs in own.items():
+            pool[(minute + delay) % HORIZON_MINUTES] += runs * factor
+        lines.append(schedule_line(entry, fields, delay))
+        if overflow > 1e-9:
+            warnings.append(
+                f"{entry.workflow}: oversubscribes '{test['location']}' by {overflow:.2f} factor "
+                f"even when delayed {delay} minutes"
+            )
+    return lines, warnings
+
+
+def schedule_line(entry, fields, delay):
+    minutes, hours = fields
+    line = ' '.join([
+        format_field(minutes), format_field(hours), format_field(entry.days),
+        format_field(entry.months), format_field(entry.weekdays), f'"{entry.workflow}"'
+    ])
+    # The note goes on its own line: run-test-scheduled.sh reads everything after the fifth field as the name
+    return f"# delayed {delay} min\n{line}" if delay else line
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: ./planner.py <test_home> <capacity> <schedule_file> [<schedule_file> ...]")
+        sys.exit(1)
+
+    capacity = {
+        location: float(factor)
+        for location, factor in (item.split('=') for item in sys.argv[2].split(','))
+    }
+    entries = [entry for path in sys.argv[3:] for entry in parse_schedule(path)]
+    lines, warnings = plan(entries, sys.argv[1], capacity)
+    for line in lines:
+        print(line)
+    for warning in warnings:
+        print(f"[WARN] {warning}", file=sys.stderr)
+    sys.exit(1 if warnings else 0)
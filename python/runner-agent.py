@@ -0,0 +1,211 @@
+#!/usr/bin/python
+# Runner agent for worker servers.
+#
+# Long-polls the DPT Registry (/agent/poll) over one persistent connection for jobs queued for this
+# server, starts/stops the test containers locally with podman, streams their output and status
+# back (/agent/jobs/<id>/status) and keeps the test run's heartbeat alive while a container runs.
+# Orchestrators queue jobs with POST /agent/jobs instead of opening ssh sessions to every worker.
+#
+# Usage: ./runner-agent.py <registry_url> <api_version> <api_key> [servername]
+#
+# Environment:
+#   AGENT_IMAGES          comma-separated images jobs may start (default jmeter-test,jmeter-server,jmeter-client)
+#   POLL_WAIT_SECONDS     how long each poll waits for a job (default 20)
+#   LOG_INTERVAL_SECONDS  how often output and heartbeats are sent while a container runs (default 5)
+#   AGENT_WORKDIR_ROOT    directory job workdirs must be under (default the agent user's home, e.g. /home/<ssh_user>)
+
+import http.client
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+AGENT_IMAGES = set(os.environ.get("AGENT_IMAGES", "jmeter-test,jmeter-server,jmeter-client").split(','))
+POLL_WAIT_SECONDS = int(os.environ.get("POLL_WAIT_SECONDS", "20"))
+LOG_INTERVAL_SECONDS = int(os.environ.get("LOG_INTERVAL_SECONDS", "5"))
+AGENT_WORKDIR_ROOT = os.path.realpath(os.environ.get("AGENT_WORKDIR_ROOT", os.path.expanduser("~")))
+STAGING_DIR = "/opt/jmeter/staging"
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class RegistryClient:
+    """
+    Keep-alive HTTP connection to the DPT Registry, reopened after errors.
+    Not thread-safe: every thread uses its own client.
+    """
+
+    def __init__(self, registry_url, api_version, api_key):
+        url = urllib.parse.urlsplit(registry_url)
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = url.netloc
+        self.prefix = f"{url.path.rstrip('/')}/{api_version}"
+        self.headers = {'accept': 'application/json', 'Content-Type': 'application/json', 'X-API-Key': api_key}
+        self.connection = None
+
+    def request(self, method, path, payload=None, timeout=30):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.netloc, timeout=timeout)
+            try:
+                if self.connection.sock is not None:
+                    self.connection.sock.settimeout(timeout)
+                self.connection.request(method, f"{self.prefix}{path}", body=body, headers=self.headers)
+                response = self.connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                # The registry closed the idle connection (or restarted): reconnect once
+                self.close()
+                if attempt:
+                    raise
+                continue
+            if response.status >= 400:
+                raise RuntimeError(f"{method} {path} failed with status {response.status}: {data[:200]!r}")
+            return json.loads(data) if data else None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def job_workdir(spec):
+    """
+    The job's workdir with symlinks resolved, or None when it has none. Jobs come from anyone
+    holding an API key, so only directories below AGENT_WORKDIR_ROOT are mounted or written to.
+    """
+    if not spec.get("workdir"):
+        return None
+    workdir = os.path.realpath(spec["workdir"])
+    if os.path.commonpath([workdir, AGENT_WORKDIR_ROOT]) != AGENT_WORKDIR_ROOT or workdir == AGENT_WORKDIR_ROOT:
+        raise ValueError(f"Workdir '{spec['workdir']}' is not under {AGENT_WORKDIR_ROOT}")
+    return workdir
+
+
+def archive_name(spec):
+    # A plain name inside the workdir: no separators, no '.' or '..'
+    archive = spec.get("archive")
+    if archive and (archive in ('.', '..') or os.path.basename(archive) != archive or os.sep in archive):
+        raise ValueError(f"Archive '{archive}' is not a plain file name")
+    return archive
+
+
+def podman_command(job):
+    spec = job["spec"]
+    if job["action"] == "stop":
+        return ['podman', 'stop', spec["container_name"]]
+    if spec["image"] not in AGENT_IMAGES:
+        raise ValueError(f"Image '{spec['image']}' is not allowed on this agent")
+    workdir = job_workdir(spec)
+    archive_name(spec)
+    command = ['podman', 'run', '--replace', '--name', spec["container_name"]]
+    if spec.get("detach"):
+        command.append('-d')
+    for name, value in sorted(spec.get("env", {}).items()):
+        command += ['-e', f"{name}={value}"]
+    for port in spec.get("ports", []):
+        command += ['-p', f"{port}:{port}"]
+    if workdir:
+        command += ['-v', f"{workdir}:{STAGING_DIR}"]
+    return command + [spec["image"]] + list(spec.get("args", []))
+
+
+def run_job(client, job):
+    """
+    Execute one job, reporting output every LOG_INTERVAL_SECONDS and the final status.
+    """
+    path = f"/agent/jobs/{job['id']}/status"
+    pending, lock = [], threading.Lock()
+
+    def take_log():
+        with lock:
+            chunk = ''.join(pending)
+            pending.clear()
+        return chunk or None
+
+    try:
+        command = podman_command(job)
+        logging.info(f"Job {job['id']} (run {job['run_id']}): {' '.join(command)}")
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+    except Exception as e:
+        client.request('POST', path, {"status": "failed", "log": f"{e}\n"})
+        return
+
+    def read_output():
+        for line in process.stdout:
+            with lock:
+                pending.append(line)
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    client.request('POST', path, {"status": "running"})
+    while True:
+        try:
+            process.wait(timeout=LOG_INTERVAL_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        try:
+            client.request('POST', path, {"status": "running", "log": take_log()})
+            if job["action"] == "start":
+                client.request('POST', '/heartbeat', {"run_id": job["run_id"]})
+        except Exception as e:
+            logging.warning(f"Job {job['id']}: progress update failed: {e}")
+    reader.join()
+
+    spec = job["spec"]
+    if process.returncode == 0 and spec.get("archive") and spec.get("workdir"):
+        try:
+            workdir, archive = job_workdir(spec), archive_name(spec)
+            shutil.make_archive(os.path.join(workdir, archive), 'zip', workdir, archive)
+        except Exception as e:
+            pending.append(f"[WARN] Failed to archive {spec['archive']}: {e}\n")
+
+    status = "succeeded" if process.returncode == 0 else "failed"
+    logging.info(f"Job {job['id']} {status} (exit code {process.returncode})")
+    client.request('POST', path, {"status": status, "exit_code": process.returncode, "log": take_log()})
+
+
+def _run_job_thread(registry_args, job):
+    client = RegistryClient(*registry_args)
+    try:
+        run_job(client, job)
+    except Exception as e:
+        logging.error(f"Job {job['id']}: {e}")
+    finally:
+        client.close()
+
+
+def serve_forever(registry_url, api_version, api_key, servername):
+    registry_args = (registry_url, api_version, api_key)
+    client = RegistryClient(*registry_args)
+    query = urllib.parse.urlencode({"servername": servername, "wait": POLL_WAIT_SECONDS})
+    backoff = 1
+    logging.info(f"Runner agent for {servername} polling {registry_url}")
+    while True:
+        try:
+            job = client.request('GET', f"/agent/poll?{query}", timeout=POLL_WAIT_SECONDS + 30)
+            backoff = 1
+        except Exception as e:
+            logging.warning(f"Polling the DPT Registry failed, retrying in {backoff}s: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+            continue
+        if job:
+            # Jobs run in their own threads so a long test never blocks the next dispatch (e.g. a stop)
+            threading.Thread(target=_run_job_thread, args=(registry_args, job), daemon=True).start()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: ./runner-agent.py <registry_url> <api_version> <api_key> [servername]")
+        sys.exit(1)
+
+    serve_forever(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else socket.getfqdn())
@@ -0,0 +1,353 @@
+#!/usr/bin/python
+# Long-running scheduler for the performance test workflows.
+#
+# Parses the schedule files once into a heap of next fire times, reloads a file only when it
+# changes, caches GitHub workflow name -> id lookups and dispatches due workflows concurrently.
+# Dispatching is skipped while the DPT Registry 'status' is not online and a workflow is deferred
+# while its location has less free factor than its test-definition.json asks for.
+#
+# Usage: ./scheduler.py <github_token> <repo> <ref_name> <schedule_file> [<schedule_file> ...]
+#
+# Environment:
+#   GITHUB_API_URL       GitHub API base URL (default https://api.github.com, point it to a local stand-in for testing)
+#   DPT_REGISTRY_URL     DPT Registry base URL (capacity checks are skipped when unset)
+#   API_VERSION          DPT Registry API version (default v3)
+#   PTP_API_KEY          DPT Registry API key
+#   MAX_PARALLEL         Maximum concurrent dispatches (default 4)
+#   TIME_WINDOW_MINUTES  How late a fire may still be dispatched, e.g. after a restart (default 15)
+#   TEST_HOME            Directory holding LAC.xxxx/TEST.yyyy/test-definition.json (default: the schedule file's directory)
+
+import heapq
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+DPT_REGISTRY_URL = os.environ.get("DPT_REGISTRY_URL")
+API_VERSION = os.environ.get("API_VERSION", "v3")
+PTP_API_KEY = os.environ.get("PTP_API_KEY", "")
+MAX_PARALLEL = int(os.environ.get("MAX_PARALLEL", "4"))
+TIME_WINDOW_MINUTES = int(os.environ.get("TIME_WINDOW_MINUTES", "15"))
+TEST_HOME = os.environ.get("TEST_HOME")
+
+FILE_CHECK_SECONDS = 30
+CAPACITY_RETRY_MINUTES = 5
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class ScheduleEntry:
+    """
+    One schedule line: minute hour day-of-month month day-of-week "workflow".
+    Each field is '%' (any) or a comma-separated list of numbers; day of week
+    is 0-6 from Sunday, 7 is also accepted for Sunday.
+    """
+
+    def __init__(self, line):
+        fields, _, rest = line.strip().partition('"')
+        workflow, closing_quote, _ = rest.partition('"')  # anything after the name is a comment
+        parts = fields.split()
+        if len(parts) != 5 or not closing_quote:
+            raise ValueError(f"Invalid schedule line: {line.strip()}")
+        self.workflow = workflow
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            None if part == '%' else {int(v) for v in part.split(',')} for part in parts
+        )
+        if self.weekdays is not None and 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+
+    def _day_matches(self, moment):
+        if self.days is not None and moment.day not in self.days:
+            return False
+        # Python: Monday=0 ... Sunday=6; schedule: Sunday=0 ... Saturday=6
+        return self.weekdays is None or (moment.weekday() + 1) % 7 in self.weekdays
+
+    def next_fire(self, after):
+        """
+        First matching minute strictly after 'after' (None if there is none within a year).
+        """
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366)
+        while moment <= limit:
+            if self.months is not None and moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif self.hours is not None and moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif self.minutes is not None and moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        return None
+
+
+def parse_schedule(path):
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            try:
+                entries.append(ScheduleEntry(line))
+            except ValueError as e:
+                logging.warning(f"{path}: {e}")
+    return entries
+
+
+def load_test(test_home, workflow):
+    """
+    Returns {lac, test, type, factor, location, environment} for a workflow, or None when it
+    has no performance test definition.
+    """
+    match = re.match(r'(LAC\.\d+)-(TEST\.\d+)', workflow)
+    if not match:
+        return None
+    path = os.path.join(test_home, match.group(1), match.group(2), 'test-definition.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        definition = json.load(f)
+    perf = definition.get('test', {}).get('performance')
+    if not perf:
+        return None
+    return {
+        "lac": match.group(1),
+        "test": match.group(2),
+        "type": perf.get('test_type', ''),
+        "factor": float(perf.get('factor', 1)),
+        "location": perf.get('location', ''),
+        # Same value run-test-performance.sh registers and asks /workers for
+        "environment": ','.join(definition.get('xrayFields', {}).get('environments', []))
+    }
+
+
+class GitHubClient:
+    def __init__(self, token, repo, ref, api_url=GITHUB_API_URL):
+        self.token = token
+        self.repo = repo
+        self.ref = ref
+        self.api_url = api_url.rstrip('/')
+        self._workflow_ids = {}
+        self._lock = threading.Lock()
+
+    def _open(self, method, url, payload=None):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload).encode('utf-8') if payload is not None else None,
+            headers={
+                'Authorization': f'token {self.token}',
+                'Accept': 'application/vnd.github.v3+json',
+                'Content-Type': 'application/json'
+            },
+            method=method
+        )
+        return urllib.request.urlopen(request, timeout=30)
+
+    def _request(self, method, path, payload=None):
+        with self._open(method, f"{self.api_url}{path}", payload) as response:
+            body = response.read()
+            return json.loads(body) if body else None
+
+    def _list(self, path, key):
+        # Follows the Link rel="next" header through every page of a list endpoint
+        url, items = f"{self.api_url}{path}", []
+        while url:
+            with self._open('GET', url) as response:
+                items.extend(json.loads(response.read()).get(key, []))
+                match = re.search(r'<([^>]+)>;\s*rel="next"', response.headers.get('Link') or '')
+            url = match.group(1) if match else None
+        return items
+
+    def workflow_id(self, name):
+        # The workflow list is fetched again only for names not seen yet
+        with self._lock:
+            if name not in self._workflow_ids:
+                workflows = self._list(f"/repos/{self.repo}/actions/workflows?per_page=100", 'workflows')
+                self._workflow_ids = {w['name']: w['id'] for w in workflows}
+            return self._workflow_ids.get(name)
+
+    def dispatch(self, name):
+        workflow_id = self.workflow_id(name)
+        if workflow_id is None:
+            logging.warning(f"No workflow found with name: {name}")
+            return False
+        self._request('POST', f"/repos/{self.repo}/actions/workflows/{workflow_id}/dispatches", {"ref": self.ref})
+        logging.info(f"Triggered workflow '{name}' (ID {workflow_id})")
+        return True
+
+
+def registry_get(path):
+    request = urllib.request.Request(
+        f"{DPT_REGISTRY_URL}/{API_VERSION}{path}",
+        headers={'accept': 'application/json', 'X-API-Key': PTP_API_KEY}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def registry_state():
+    """
+    Returns ('skip', None) when the registry is not online, otherwise ('run', free) where free
+    maps (location, environment) to the free factor of its up workers (None: no capacity check).
+    """
+    if not DPT_REGISTRY_URL:
+        return 'run', None
+    try:
+        if registry_get('/configuration/status').get('value') != 'online':
+            return 'skip', None
+        free = {}
+        for l in registry_get('/locations'):
+            if l['status'] == 'up' and l['available_factor'] > 0:
+                key = (l['location'], l['environment'])
+                free[key] = free.get(key, 0.0) + l['available_factor']
+        return 'run', free
+    except Exception as e:
+        logging.warning(f"DPT Registry check failed, dispatching anyway: {e}")
+    return 'run', None
+
+
+def take_capacity(free, test):
+    """
+    Reserves the test's factor from 'free' if it fits (a factor may be split across the workers of
+    a location). Workflows without a test definition only need some free factor anywhere.
+    """
+    if free is None:
+        return True
+    if test is None:
+        return any(factor > 0 for factor in free.values())
+    key = (test['location'], test['environment'])
+    if free.get(key, 0.0) + 1e-9 < test['factor']:
+        return False
+    free[key] -= test['factor']
+    return True
+
+
+class Scheduler:
+    def __init__(self, github, schedule_files, max_parallel=MAX_PARALLEL, test_home=TEST_HOME):
+        self.github = github
+        self.test_home = test_home
+        self.schedule_files = schedule_files
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel)
+        self._mtimes = {}
+        self._entries = {}
+        self._heap = []
+        self._seq = 0
+        self._processed_until = None
+
+    def _push(self, fire_time, path, entry):
+        if fire_time is not None:
+            self._seq += 1
+            heapq.heappush(self._heap, (fire_time, self._seq, path, entry))
+
+    def reload_changed(self, now):
+        changed = False
+        for path in self.schedule_files:
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                mtime = None
+            if self._mtimes.get(path, -1) == mtime:
+                continue
+            self._mtimes[path] = mtime
+            self._entries[path] = parse_schedule(path) if mtime is not None else []
+            for entry in self._entries[path]:
+                entry.test = load_test(self.test_home or os.path.dirname(path), entry.workflow)
+            logging.info(f"Loaded {len(self._entries[path])} entries from {path}")
+            changed = True
+        if changed:
+            # Fires up to the last processed minute already happened; don't repeat them after a reload
+            since = self._processed_until or now - timedelta(minutes=1)
+            # Capacity retries are one-off fires with no schedule line; keep those whose workflow is still scheduled
+            retries = [
+                (fire_time, path, entry) for fire_time, _, path, entry in self._heap
+                if isinstance(entry, _Retry) and any(e.workflow == entry.workflow for e in self._entries[path])
+            ]
+            self._heap = []
+            for fire_time, path, entry in retries:
+                self._push(fire_time, path, entry)
+            for path, entries in self._entries.items():
+                for entry in entries:
+                    self._push(entry.next_fire(since), path, entry)
+
+    def due(self, now):
+        """
+        Pop every entry due at 'now', rescheduling each for its next fire.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_time, _, path, entry = heapq.heappop(self._heap)
+            if now - fire_time <= timedelta(minutes=TIME_WINDOW_MINUTES):
+                due.append((fire_time, path, entry))
+            else:
+                logging.warning(f"Skipping '{entry.workflow}' missed at {fire_time}")
+            self._push(entry.next_fire(fire_time), path, entry)
+        return due
+
+    def run_due(self, now):
+        due = self.due(now)
+        self._processed_until = now
+        if not due:
+            return []
+        state, free = registry_state()
+        if state == 'skip':
+            logging.warning(f"DPT Registry is not online, skipping {len(due)} workflow(s)")
+            return []
+        ready = []
+        for fire_time, path, entry in due:
+            if take_capacity(free, entry.test):
+                ready.append(entry)
+                continue
+            # A retry is bounded by the schedule time it stands in for, not by its own fire time
+            scheduled = entry.scheduled if isinstance(entry, _Retry) else fire_time
+            retry = now + timedelta(minutes=CAPACITY_RETRY_MINUTES)
+            if retry - scheduled <= timedelta(minutes=TIME_WINDOW_MINUTES):
+                logging.warning(f"Not enough free factor for '{entry.workflow}', retrying in {CAPACITY_RETRY_MINUTES} minutes")
+                self._push(retry, path, _Retry(entry, scheduled))
+            else:
+                logging.warning(f"Not enough free factor for '{entry.workflow}' scheduled at {scheduled}, skipping it")
+        return [self.executor.submit(self._dispatch, entry.workflow) for entry in ready]
+
+    def _dispatch(self, workflow):
+        try:
+            return self.github.dispatch(workflow)
+        except Exception as e:
+            logging.error(f"Failed to trigger workflow '{workflow}': {e}")
+            return False
+
+    def serve_forever(self):
+        while True:
+            now = datetime.now()
+            self.reload_changed(now)
+            self.run_due(now)
+            wait = FILE_CHECK_SECONDS
+            if self._heap:
+                wait = min(wait, max(0.0, (self._heap[0][0] - datetime.now()).total_seconds()))
+            time.sleep(max(wait, 0.5))
+
+
+class _Retry:
+    # One-off re-fire of an entry deferred for capacity; it never schedules itself again
+    def __init__(self, entry, scheduled):
+        self.workflow = entry.workflow
+        self.test = entry.test
+        self.scheduled = scheduled  # the schedule fire it stands in for
+
+    def next_fire(self, after):
+        return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 5:
+        print("Usage: ./scheduler.py <github_token> <repo> <ref_name> <schedule_file> [<schedule_file> ...]")
+        sys.exit(1)
+
+    github = GitHubClient(sys.argv[1], sys.argv[2], sys.argv[3])
+    Scheduler(github, sys.argv[4:]).serve_forever()
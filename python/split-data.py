@@ -0,0 +1,150 @@
+#!/usr/bin/python
+# Splits a CSV test data file into one shard per worker in a single streaming pass.
+#
+# Every shard starts with the CSV header and is written as split-<file>-data-NN (NN = worker index),
+# the names run-test-performance-jmeter.sh distributes. Rows are assigned by mode:
+#
+#   weighted     rows in proportion to each worker's weight, interleaved (smooth weighted round-robin),
+#                so any prefix of the file is also split proportionally (default)
+#   round-robin  one row per worker in turn, ignoring the weights
+#   hash         by a hash of the key column, so the same key always goes to the same worker
+#                (spread over the workers in proportion to their weights)
+#
+# Usage: ./split-data.py <csv_file> <weights> [weighted|round-robin|hash] [key_column]
+#
+#   weights  comma-separated weight per worker (e.g. the factor allocated to each, "1.5,0.5,1"),
+#            or a worker count for equal shares
+#
+# Environment:
+#   SPLIT_MMAP  set to 1 to read the file through mmap instead of buffered reads
+
+import bisect
+import csv
+import mmap
+import os
+import sys
+import zlib
+
+SPLIT_MMAP = os.environ.get("SPLIT_MMAP", "0") == "1"
+BUFFER_SIZE = 1024 * 1024
+
+
+def parse_weights(value):
+    if ',' not in value and value.isdigit():
+        return [1.0] * int(value)
+    weights = [float(w) for w in value.split(',')]
+    if not weights or any(w < 0 for w in weights) or sum(weights) <= 0:
+        raise ValueError(f"Invalid weights: {value}")
+    return weights
+
+
+def _lines(f):
+    if SPLIT_MMAP and os.fstat(f.fileno()).st_size > 0:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b'')
+    else:
+        yield from f
+
+
+def weighted_picker(weights):
+    # Smooth weighted round-robin: each row goes to the worker furthest behind its share
+    current = [0.0] * len(weights)
+    total = sum(weights)
+
+    def pick(_line):
+        for i, weight in enumerate(weights):
+            current[i] += weight
+        chosen = max(range(len(weights)), key=current.__getitem__)
+        current[chosen] -= total
+        return chosen
+    return pick
+
+
+def round_robin_picker(count):
+    state = [-1]
+
+    def pick(_line):
+        state[0] = (state[0] + 1) % count
+        return state[0]
+    return pick
+
+
+def hash_picker(weights, key_index):
+    # The 32-bit key hash is mapped onto cumulative weight ranges
+    total = sum(weights)
+    bounds, running = [], 0.0
+    for weight in weights[:-1]:
+        running += weight
+        bounds.append(running / total * 2 ** 32)
+
+    def pick(line):
+        fields = next(csv.reader([line.decode('utf-8', errors='replace')]), [])
+        key = fields[key_index] if key_index < len(fields) else ''
+        return bisect.bisect_right(bounds, zlib.crc32(key.encode('utf-8')))
+    return pick
+
+
+def split_file(csv_file_path, weights, mode="weighted", key_column=None, output_dir=None):
+    """
+    Returns the number of data rows written to each shard.
+    """
+    output_dir = output_dir or os.path.dirname(csv_file_path) or '.'
+    name = os.path.basename(csv_file_path)
+    counts = [0] * len(weights)
+
+    with open(csv_file_path, 'rb', buffering=BUFFER_SIZE) as f:
+        lines = _lines(f)
+        header = next(lines, b'')
+        if not header.strip():
+            raise ValueError(f"File {csv_file_path} is empty")
+        if not header.endswith(b'\n'):
+            header += b'\n'
+
+        if mode == "weighted":
+            pick = weighted_picker(weights)
+        elif mode == "round-robin":
+            pick = round_robin_picker(len(weights))
+        elif mode == "hash":
+            columns = next(csv.reader([header.decode('utf-8-sig').strip()]))
+            if key_column not in columns:
+                raise ValueError(f"Key column '{key_column}' not found in {csv_file_path}")
+            pick = hash_picker(weights, columns.index(key_column))
+        else:
+            raise ValueError(f"Unsupported mode: {mode}")
+
+        shards = [
+            open(os.path.join(output_dir, f"split-{name}-data-{i:02d}"), 'wb', buffering=BUFFER_SIZE)
+            for i in range(len(weights))
+        ]
+        try:
+            for shard in shards:
+                shard.write(header)
+            for line in lines:
+                if not line.strip():
+                    continue
+                if not line.endswith(b'\n'):
+                    line += b'\n'
+                i = pick(line)
+                shards[i].write(line)
+                counts[i] += 1
+        finally:
+            for shard in shards:
+                shard.close()
+
+    if not sum(counts):
+        raise ValueError(f"File {csv_file_path} has no data rows")
+    return counts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or (len(sys.argv) > 3 and sys.argv[3] == "hash" and len(sys.argv) < 5):
+        print("Usage: ./split-data.py <csv_file> <weights> [weighted|round-robin|hash] [key_column]")
+        sys.exit(1)
+
+    try:
+        counts = split_file(sys.argv[1], parse_weights(sys.argv[2]), *sys.argv[3:5])
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    for i, count in enumerate(counts):
+        print(f"[INFO] split-{os.path.basename(sys.argv[1])}-data-{i:02d}: {count} rows")
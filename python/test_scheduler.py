@@ -0,0 +1,47 @@
+#!/usr/bin/python
+# Tests for scheduler.py: python3 -m unittest discover -s python
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import scheduler
+
+
+class CapacityRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(handle, 'w') as f:
+            f.write('0 % % % % "LAC.0001-TEST.0001-hourly"\n')
+        self.github = mock.Mock()
+        self.scheduler = scheduler.Scheduler(self.github, [self.path], test_home=tempfile.gettempdir())
+
+    def tearDown(self):
+        self.scheduler.executor.shutdown()
+        os.remove(self.path)
+
+    def test_retries_stop_after_the_time_window(self):
+        start = datetime(2026, 1, 5, 12, 59)
+        self.scheduler.reload_changed(start)
+        window = timedelta(minutes=scheduler.TIME_WINDOW_MINUTES)
+
+        # The registry never has free factor
+        with mock.patch.object(scheduler, 'registry_state', return_value=('run', {})):
+            for minute in range(5 * 60):
+                now = start + timedelta(minutes=minute)
+                self.scheduler.run_due(now)
+                for fire_time, _, _, entry in self.scheduler._heap:
+                    if isinstance(entry, scheduler._Retry):
+                        self.assertLessEqual(fire_time - entry.scheduled, window)
+                        self.assertGreaterEqual(entry.scheduled, now - window)
+
+        self.github.dispatch.assert_not_called()
+        retries = [e for _, _, _, e in self.scheduler._heap if isinstance(e, scheduler._Retry)]
+        self.assertLessEqual(len(retries), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
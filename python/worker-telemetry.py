@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# Periodically posts CPU, load, memory and network metrics of this host to the DPT Registry (/telemetry).
+# Reads /proc only, no third-party packages.
+#
+# Usage: ./worker-telemetry.py <registry_url> <api_version> <api_key> [interval_seconds]
+
+import json
+import socket
+import sys
+import time
+import urllib.request
+
+
+def read_cpu_times():
+    with open('/proc/stat', 'r') as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + values[4]  # idle + iowait
+    return idle, sum(values)
+
+
+def read_load1():
+    with open('/proc/loadavg', 'r') as f:
+        return float(f.read().split()[0])
+
+
+def read_memory_mb():
+    meminfo = {}
+    with open('/proc/meminfo', 'r') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            meminfo[key] = int(value.split()[0])
+    return meminfo.get('MemAvailable', meminfo['MemFree']) / 1024, meminfo['MemTotal'] / 1024
+
+
+def read_network_bytes():
+    rx = tx = 0
+    with open('/proc/net/dev', 'r') as f:
+        for line in f.readlines()[2:]:
+            name, data = line.split(':', 1)
+            if name.strip() == 'lo':
+                continue
+            fields = data.split()
+            rx += int(fields[0])
+            tx += int(fields[8])
+    return rx, tx
+
+
+def post(url, api_key, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'X-API-Key': api_key},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
+
+
+def run(registry_url, api_version, api_key, interval):
+    url = f"{registry_url}/{api_version}/telemetry"
+    servername = socket.getfqdn()
+    idle, total = read_cpu_times()
+    rx, tx = read_network_bytes()
+    while True:
+        time.sleep(interval)
+        new_idle, new_total = read_cpu_times()
+        new_rx, new_tx = read_network_bytes()
+        elapsed_total = max(1, new_total - total)
+        mem_free, mem_total = read_memory_mb()
+        payload = {
+            "servername": servername,
+            "cpu_percent": 100 * (1 - (new_idle - idle) / elapsed_total),
+            "load1": read_load1(),
+            "mem_free_mb": mem_free,
+            "mem_total_mb": mem_total,
+            "net_rx_kbps": (new_rx - rx) * 8 / 1000 / interval,
+            "net_tx_kbps": (new_tx - tx) * 8 / 1000 / interval
+        }
+        idle, total, rx, tx = new_idle, new_total, new_rx, new_tx
+        try:
+            post(url, api_key, payload)
+        except Exception as e:
+            print(f"[WARN] Failed to send telemetry: {e}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: ./worker-telemetry.py <registry_url> <api_version> <api_key> [interval_seconds]")
+        sys.exit(1)
+
+    run(sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else 15)
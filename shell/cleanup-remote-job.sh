@@ -32,7 +32,7 @@ else
 fi
 
 # Get Vault URL from DPT Registry
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/vault_url" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/vault_url" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -89,7 +89,7 @@ SLAVE_SERVER=$(echo $EXECUTION_DATA | jq -r '.workers | join(",")')
 #SLAVE_SERVERS=$(get_execution_data "workers" "$RUN_ID" "${PTP_API_KEY}" | jq -r 'join(",")')
 
 # Get Orchestrator Server (SSH_HOST)
-response=$(curl -s -X 'GET' "$DPT_REGISTRY_URL/$API_VERSION/orchestrator?location=$LOCATION&environment=$ENVIRONMENT" \
+response=$(registry_curl -X 'GET' "$DPT_REGISTRY_URL/$API_VERSION/orchestrator?location=$LOCATION&environment=$ENVIRONMENT" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
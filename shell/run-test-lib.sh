@@ -6,13 +6,37 @@ export API_VERSION="v3"
 export JIRA_URL="https://ecom4isi.atlassian.net/rest/api"
 export VAULT_URL="http://dcvx-jmtapp-g1:8200"
 
+# Retries of a DPT Registry request answered with 429 (rate limited)
+export REGISTRY_RETRIES="${REGISTRY_RETRIES:-5}"
+
+# curl a DPT Registry endpoint and print the response body. A 429 is retried after the
+# Retry-After seconds the registry sends, up to REGISTRY_RETRIES times
+# Usage: registry_curl <curl arguments>
+registry_curl() {
+    local headers output code retry_after attempt
+    headers=$(mktemp)
+    for attempt in $(seq 0 "${REGISTRY_RETRIES}"); do
+        output=$(curl -s -D "${headers}" -w '\n%{http_code}' "$@")
+        code="${output##*$'\n'}"
+        output="${output%$'\n'*}"
+        if [[ "${code}" != "429" || "${attempt}" -eq "${REGISTRY_RETRIES}" ]]; then
+            break
+        fi
+        retry_after=$(awk 'tolower($1) == "retry-after:" { print $2 + 0 }' "${headers}")
+        echo "[WARN] DPT Registry rate limit reached, retrying in ${retry_after:-1}s..." >&2
+        sleep "${retry_after:-1}"
+    done
+    rm -f "${headers}"
+    echo "${output}"
+}
+
 # Get parameter from DPT Registry
 # Usage: get_parameter <parameter_name>
 get_parameter() {
     local PARAMETER="$1"
     local PTP_API_KEY="$2"
 
-    response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/${PARAMETER}" \
+    response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/${PARAMETER}" \
         -H 'accept: application/json' \
         -H "X-API-Key: ${PTP_API_KEY}" \
         -H 'Content-Type: application/json')
@@ -33,7 +57,7 @@ get_execution_data() {
     local RUN_ID="$2"
     local PTP_API_KEY="$3"
 
-    response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/test-data?column=${PARAMETER}&run_id=${RUN_ID}" \
+    response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/test-data?column=${PARAMETER}&run_id=${RUN_ID}" \
         -H 'accept: application/json' \
         -H "X-API-Key: ${PTP_API_KEY}" \
         -H 'Content-Type: application/json')
@@ -51,7 +75,7 @@ get_all_execution_data() {
     local RUN_ID="$1"
     local PTP_API_KEY="$2"
 
-    response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/test-data-all?run_id=${RUN_ID}" \
+    response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/test-data-all?run_id=${RUN_ID}" \
         -H 'accept: application/json' \
         -H "X-API-Key: ${PTP_API_KEY}" \
         -H 'Content-Type: application/json')
@@ -71,13 +95,26 @@ register_test_complete() {
     local STATUS="$2"
     local PTP_API_KEY="$3"
 
-    curl -s -X 'POST' "$DPT_REGISTRY_URL/$API_VERSION/complete" \
+    registry_curl -X 'POST' "$DPT_REGISTRY_URL/$API_VERSION/complete" \
         -H 'accept: application/json' \
         -H 'Content-Type: application/json' \
         -H "X-API-Key: ${PTP_API_KEY}" \
         -d "{ \"run_id\": $RUN_ID, \"status\": \"${STATUS}\" }"
 }
 
+# Tell DPT Registry the test is still alive (executions without heartbeats are marked as lost)
+# Usage: send_heartbeat <run_id>
+send_heartbeat() {
+    local RUN_ID="$1"
+    local PTP_API_KEY="$2"
+
+    registry_curl -o /dev/null -X 'POST' "$DPT_REGISTRY_URL/$API_VERSION/heartbeat" \
+        -H 'accept: application/json' \
+        -H 'Content-Type: application/json' \
+        -H "X-API-Key: ${PTP_API_KEY}" \
+        -d "{ \"run_id\": $RUN_ID }"
+}
+
 # Handle errors and register test failure
 # Usage: handle_error <error_message> <run_id>
 handle_error() {
@@ -29,16 +29,41 @@ API_VERSION="${23}"
 VAULT_TOKEN="${24}"
 PTP_API_KEY="${25}"
 AUTHENTICATION="${26}"
+WORKER_FACTORS="${27}"
+
+# Retries of a DPT Registry request answered with 429 (rate limited)
+REGISTRY_RETRIES="${REGISTRY_RETRIES:-5}"
 
 RAM=14336 # 14GB RAM Max for container
 CPU=4 # 4 CPU Max for container
 
+# curl a DPT Registry endpoint and print the response body. A 429 is retried after the
+# Retry-After seconds the registry sends, up to REGISTRY_RETRIES times
+# Usage: registry_curl <curl arguments> (same as in run-test-lib.sh, which is not deployed to this host)
+registry_curl() {
+    local headers output code retry_after attempt
+    headers=$(mktemp)
+    for attempt in $(seq 0 "${REGISTRY_RETRIES}"); do
+        output=$(curl -s -D "${headers}" -w '\n%{http_code}' "$@")
+        code="${output##*$'\n'}"
+        output="${output%$'\n'*}"
+        if [[ "${code}" != "429" || "${attempt}" -eq "${REGISTRY_RETRIES}" ]]; then
+            break
+        fi
+        retry_after=$(awk 'tolower($1) == "retry-after:" { print $2 + 0 }' "${headers}")
+        echo "[WARN] DPT Registry rate limit reached, retrying in ${retry_after:-1}s..." >&2
+        sleep "${retry_after:-1}"
+    done
+    rm -f "${headers}"
+    echo "${output}"
+}
+
 register_test_complete() {
     local RUN_ID="$1"
     local STATUS="$2"
     local PTP_API_KEY="$3"
 
-    curl -s -X 'POST' "$DPT_REGISTRY_URL/$API_VERSION/complete" \
+    registry_curl -X 'POST' "$DPT_REGISTRY_URL/$API_VERSION/complete" \
         -H 'accept: application/json' \
         -H 'Content-Type: application/json' \
         -H "X-API-Key: ${PTP_API_KEY}" \
@@ -178,79 +203,131 @@ else
     # Count the number of slave servers into NUM_SLAVES
     NUM_SLAVES=$(echo $SLAVE_SERVERS | tr ',' '\n' | wc -l)
 
-     for file in $TEST_DATA_FILE; do
-     
-        # Preserve the header and split the file into chunks  
-        HEADER=$(head -n 1 "$file")
-        TOTAL_LINES=$(($(wc -l < "$file") - 1))
-        LINES_PER_CHUNK=$(( (TOTAL_LINES + NUM_SLAVES - 1) / NUM_SLAVES ))
-
-        if [ $TOTAL_LINES -eq 0 ]; then
-            handle_error "[ERROR] File $file is empty or does not exist..." ${RUN_ID} "${PTP_API_KEY}"
-        fi
+    # Optional "data_split": { "mode": "weighted|round-robin|hash", "key": "<column>" } in test-definition.json
+    SPLIT_MODE=$(jq -r '.test.performance.data_split.mode // "weighted"' test-definition.json)
+    SPLIT_KEY=$(jq -r '.test.performance.data_split.key // empty' test-definition.json)
 
-        tail -n +2 "$file" | split -l "$LINES_PER_CHUNK" -d -a 2 - "${file}-data-"
+    for file in $TEST_DATA_FILE; do
 
-        # Add the header to each split file
-        for FILEN in ${file}-data-*; do
-            echo "$HEADER" > "split-$(basename $FILEN)"
-            cat "$FILEN" >> "split-$(basename $FILEN)"
-            rm "$FILEN"
-        done
+        # One pass over the file, header kept in every split-<file>-data-NN; rows are shared in proportion
+        # to the factor allocated to each worker (equally when the registry did not return the allocation)
+        python3 /tmp/split-data.py "$file" "${WORKER_FACTORS:-${NUM_SLAVES}}" "${SPLIT_MODE}" ${SPLIT_KEY:+"$SPLIT_KEY"} || \
+            handle_error "[ERROR] Failed to split $file..." ${RUN_ID} "${PTP_API_KEY}"
 
     done
 
     IFS=',' read -r -a SERVER_ARRAY <<< $SLAVE_SERVERS
 
-    i=0
-    for SERVER in "${SERVER_ARRAY[@]}"; do
-        
-        # Create a directory for the test files
-        ssh -q $SSH_USER@$SERVER "rm -rf /home/$SSH_USER/${LAC_ID}/${TEST_ID}; mkdir -p /home/$SSH_USER/${LAC_ID}/${TEST_ID}"
+    # Copy the test definition files and each server's own split of the test data files to all servers at once
+    # ({i} is the server index); files a server already has from previous runs are not sent again
+    echo "[INFO] Distributing test files to all servers..."
+    DISTRIBUTE_FILES=("${TEST_DEFINITION_FILE}" "test-definition.json")
+    for ORIGINAL in ${TEST_DATA_FILE}; do
+        DISTRIBUTE_FILES+=("split-${ORIGINAL}-data-{i}=${ORIGINAL}")
+    done
+    python3 /tmp/distribute.py push "${SSH_USER}" "${SLAVE_SERVERS}" "/home/${SSH_USER}/${LAC_ID}/${TEST_ID}" "${DISTRIBUTE_FILES[@]}" || \
+        handle_error "[ERROR] Failed to distribute test files!" "${RUN_ID}" "${PTP_API_KEY}"
 
-        # Copy the test data file to each server
-        for ORIGINAL in ${TEST_DATA_FILE}; do
-               
-            # Copy file to each server (fixed PATH)
-            num=$(printf "%02d" "$i")
-            scp -q split-${ORIGINAL}-data-${num} $SSH_USER@$SERVER:/home/$SSH_USER/${LAC_ID}/${TEST_ID}/$ORIGINAL
+    # Workers running python/runner-agent.py take the test as one job dispatch instead of an ssh session each
+    RUNNER_AGENT=$(registry_curl "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/runner_agent" \
+        -H 'accept: application/json' \
+        -H "X-API-Key: ${PTP_API_KEY}" | jq -r '.value // empty' 2>/dev/null)
+
+    if [ "${RUNNER_AGENT}" == "enabled" ]; then
+
+        echo "[INFO] Dispatching test to the runner agents..."
+        ARGS=$(jq -cn --arg definition "${TEST_DEFINITION_FILE}" --arg params "${TOOL_PARAMS}" '[$definition] + ($params | split(" ") | map(select(length > 0)))')
+        SERVERS_JSON=$(jq -cn --arg servers "${SLAVE_SERVERS}" '$servers | split(",")')
+        DATA="{ \"run_id\": ${RUN_ID}, \"servers\": ${SERVERS_JSON}, \"action\": \"start\", \"spec\": { \"image\": \"jmeter-test\", \"container_name\": \"${CONTAINER_NAME}\", \"workdir\": \"/home/${SSH_USER}/${LAC_ID}/${TEST_ID}\", \"args\": ${ARGS}, \"archive\": \"report\" } }"
+
+        response=$(registry_curl -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/agent/jobs" \
+            -H 'accept: application/json' \
+            -H 'Content-Type: application/json' \
+            -H "X-API-Key: ${PTP_API_KEY}" \
+            -d "${DATA}")
+        if [[ "${response}" != *"Jobs queued"* ]]; then
+            handle_error "[ERROR] Failed to dispatch test to the runner agents! ${response}" "${RUN_ID}" "${PTP_API_KEY}"
+        fi
 
+        # Wait for all servers to finish execution, at most twice the predicted duration of the test
+        # (p90 of its previous runs) plus 10 minutes, or AGENT_WAIT_MINUTES when there is no prediction
+        PREDICTED=$(registry_curl "${DPT_REGISTRY_URL}/${API_VERSION}/predict?lac=${LAC_ID}&test=${TEST_ID}&type=${TEST_TYPE}" \
+            -H 'accept: application/json' \
+            -H "X-API-Key: ${PTP_API_KEY}" | jq -r '.p90_seconds // empty' 2>/dev/null)
+        if [[ "${PREDICTED}" =~ ^[0-9]+(\.[0-9]+)?$ ]]; then
+            WAIT_SECONDS=$(( ${PREDICTED%.*} * 2 + 600 ))
+        else
+            WAIT_SECONDS=$(( ${AGENT_WAIT_MINUTES:-360} * 60 ))
+        fi
+        DEADLINE=$(( SECONDS + WAIT_SECONDS ))
+        UNREADABLE=0
+        while true; do
+            sleep 10
+            JOBS=$(registry_curl "${DPT_REGISTRY_URL}/${API_VERSION}/agent/jobs?run_id=${RUN_ID}" \
+                -H 'accept: application/json' \
+                -H "X-API-Key: ${PTP_API_KEY}")
+            ACTIVE=$(echo "${JOBS}" | jq '[.[] | select(.status == "queued" or .status == "claimed" or .status == "running")] | length' 2>/dev/null)
+            if ! [[ "${ACTIVE}" =~ ^[0-9]+$ ]]; then
+                # Registry unreachable, rate limited or an error body: give up after 3 polls in a row
+                UNREADABLE=$(( UNREADABLE + 1 ))
+                echo "[WARN] Could not read the agent jobs: ${JOBS}"
+                if (( UNREADABLE >= 3 )); then
+                    handle_error "[ERROR] Failed to read the runner agent jobs! ${JOBS}" "${RUN_ID}" "${PTP_API_KEY}"
+                fi
+            elif [ "${ACTIVE}" == "0" ]; then
+                break
+            else
+                UNREADABLE=0
+            fi
+            if (( SECONDS >= DEADLINE )); then
+                # Stop whatever is still running before failing the test
+                registry_curl -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/agent/jobs" \
+                    -H 'accept: application/json' \
+                    -H 'Content-Type: application/json' \
+                    -H "X-API-Key: ${PTP_API_KEY}" \
+                    -d "{ \"run_id\": ${RUN_ID}, \"servers\": ${SERVERS_JSON}, \"action\": \"stop\", \"spec\": { \"image\": \"jmeter-test\", \"container_name\": \"${CONTAINER_NAME}\" } }" > /dev/null
+                handle_error "[ERROR] Runner agents did not finish within ${WAIT_SECONDS}s! ${JOBS}" "${RUN_ID}" "${PTP_API_KEY}"
+            fi
         done
 
-        # Copy the test definition file to each server
-        scp -q $TEST_DEFINITION_FILE $SSH_USER@$SERVER:/home/$SSH_USER/${LAC_ID}/${TEST_ID}/
-        
-        # Copy the test-definition.json file to each server
-        scp -q test-definition.json $SSH_USER@$SERVER:/home/$SSH_USER/${LAC_ID}/${TEST_ID}/
+        FAILED=$(echo "${JOBS}" | jq -r '[.[] | select(.status == "failed") | .servername] | join(",")')
+        if [ -n "${FAILED}" ]; then
+            handle_error "[ERROR] Test failed on ${FAILED}" "${RUN_ID}" "${PTP_API_KEY}"
+        fi
 
-        echo "[INFO] Starting test..."
+    else
 
-        # Run on each server
-        # --cpus ${LIMIT_CPU} --memory ${LIMIT_RAM}m
-        { ssh -q "$SSH_USER@$SERVER" "podman run --replace --name ${CONTAINER_NAME} \
-            -v /home/${SSH_USER}/${LAC_ID}/${TEST_ID}:/opt/jmeter/staging \
-            jmeter-test ${TEST_DEFINITION_FILE} ${TOOL_PARAMS}" || \
-            handle_error "[ERROR] Failed to start on $SERVER" "${RUN_ID}" "${PTP_API_KEY}"
-        } &
-     
-        i=$((i + 1))
+        for SERVER in "${SERVER_ARRAY[@]}"; do
 
-    done
-    # Wait for all servers to finish execution
-    wait
+            echo "[INFO] Starting test..."
+
+            # Run on each server, then zip its HTML report while still on the server
+            # --cpus ${LIMIT_CPU} --memory ${LIMIT_RAM}m
+            { ssh -q "$SSH_USER@$SERVER" "podman run --replace --name ${CONTAINER_NAME} \
+                -v /home/${SSH_USER}/${LAC_ID}/${TEST_ID}:/opt/jmeter/staging \
+                jmeter-test ${TEST_DEFINITION_FILE} ${TOOL_PARAMS} && \
+                { cd /home/${SSH_USER}/${LAC_ID}/${TEST_ID} && zip -q -r report.zip report/* || true; }" || \
+                handle_error "[ERROR] Failed to start on $SERVER" "${RUN_ID}" "${PTP_API_KEY}"
+            } &
+
+        done
+        # Wait for all servers to finish execution
+        wait
+
+    fi
 
     # Prepare files to attach
     FILES_TO_ATTACH=("results.jtl")
 
-    # Copy results back to the master server
+    # Copy results back to the master server from all servers at once (saved as <file>-<server>)
     echo "[INFO] Copying results back to server..."
+    python3 /tmp/distribute.py pull "${SSH_USER}" "${SLAVE_SERVERS}" "/home/${SSH_USER}/${LAC_ID}/${TEST_ID}" \
+        "/home/${SSH_USER}/${LAC_ID}/${TEST_ID}" results.jtl jmeter.log report.zip
     for SERVER in "${SERVER_ARRAY[@]}"; do
-        scp -q $SSH_USER@$SERVER:/home/$SSH_USER/${LAC_ID}/${TEST_ID}/results.jtl /home/$SSH_USER/${LAC_ID}/${TEST_ID}/results.jtl-$SERVER
-        scp -q $SSH_USER@$SERVER:/home/$SSH_USER/${LAC_ID}/${TEST_ID}/jmeter.log /home/$SSH_USER/${LAC_ID}/${TEST_ID}/jmeter.log-$SERVER
-        ssh -q $SSH_USER@$SERVER "cd /home/$SSH_USER/${LAC_ID}/${TEST_ID} && zip -q -r report.zip report/*" && \
-            scp -q $SSH_USER@$SERVER:/home/$SSH_USER/${LAC_ID}/${TEST_ID}/report.zip /home/$SSH_USER/${LAC_ID}/${TEST_ID}/report.zip-$SERVER
-
-        FILES_TO_ATTACH+=("report.zip-${SERVER}" "jmeter.log-${SERVER}")
+        if [ -f "report.zip-${SERVER}" ]; then
+            FILES_TO_ATTACH+=("report.zip-${SERVER}")
+        fi
+        FILES_TO_ATTACH+=("jmeter.log-${SERVER}")
     done
 
     # Merge results from all slave servers
@@ -272,9 +349,18 @@ if [ $? -ne 0 ]; then
     handle_error "[ERROR] Test execution failed!" ${RUN_ID} "${PTP_API_KEY}"
 fi
 
+# Build the offline HTML report from results.jtl (not fatal, the remote dashboard still exists)
+echo "[INFO] Generating HTML report from results.jtl..."
+if python3 /tmp/jmeter-report.py results.jtl results-report.html "${LAC_ID} ${TEST_ID}"; then
+    FILES_TO_ATTACH+=("results-report.html")
+else
+    echo "[WARN] HTML report generation failed!"
+fi
+
 # Convert results.jtl to JUnit XML format results-junit.xml
 echo  "[INFO] Converting results.jtl to JUnit XML format..."
-if ! /tmp/convert2junit.py csv results.jtl "test-definition.json" results-junit.xml; then
+# Per-label summaries are kept on this host to compare the run against previous runs of the same test
+if ! /tmp/convert2junit.py csv results.jtl "test-definition.json" results-junit.xml "${RUN_ID}" "${LAC_ID}-${TEST_ID}-${TEST_TYPE}-${ENVIRONMENT}"; then
     handle_error "[ERROR] JTL to JUnit XML conversion failed!" ${RUN_ID} "${PTP_API_KEY}"
 else
     # Register test results on XRAY Test Management
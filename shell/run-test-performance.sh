@@ -22,7 +22,7 @@ fi
 
 # Check if running performance tests is allowed
 echo "[INFO] Checking if performance tests are allowed..."
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -62,7 +62,7 @@ if [[ -z "${TOOL}" || -z "${EXECUTION_TYPE}" || -z "${TEST_DEFINITION_FILE}" ||
 fi
 
 echo "[INFO] Getting Orchestration Server..."
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/orchestrator?location=${LOCATION}&environment=${ENVIRONMENT}" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/orchestrator?location=${LOCATION}&environment=${ENVIRONMENT}" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -77,12 +77,12 @@ fi
 
 # Check if there is enough capacity to run the test with factor specified.
 echo "[INFO] Checking available capacity..."
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/workers?location=${LOCATION}&environment=${ENVIRONMENT}&factor=${FACTOR}" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/workers?location=${LOCATION}&environment=${ENVIRONMENT}&factor=${FACTOR}" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
 
-if [[ "${response}" != *"No servers found for location"* && "${response}" != *"Not enough servers to satisfy factor"* ]]; then
+if echo "${response}" | jq -e 'type == "array"' > /dev/null 2>&1; then
 WORKERS=${response}
 SLAVE_SERVERS=$(echo "${response}" | jq -r 'join(",")')
 echo "[INFO] The Worker Servers are: ${SLAVE_SERVERS}."
@@ -92,7 +92,7 @@ else
 fi
 
 # Get SSH_USER to connect to the orchestrator server and workers.
-response=$(curl -s -X 'GET' "$DPT_REGISTRY_URL/$API_VERSION/configuration/ssh_user" \
+response=$(registry_curl -X 'GET' "$DPT_REGISTRY_URL/$API_VERSION/configuration/ssh_user" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -127,6 +127,12 @@ case ${TOOL} in
         # Get the tool corresponding script from Github Performance Testing Repository
         download_file "python" "convert2junit.py" "${PTP_GITHUB_TOKEN}"
         scp -q ${HOME}/convert2junit.py ${SSH_USER}@${SSH_HOST}:/tmp/convert2junit.py
+        download_file "python" "jmeter-report.py" "${PTP_GITHUB_TOKEN}"
+        scp -q ${HOME}/jmeter-report.py ${SSH_USER}@${SSH_HOST}:/tmp/jmeter-report.py
+        download_file "python" "distribute.py" "${PTP_GITHUB_TOKEN}"
+        scp -q ${HOME}/distribute.py ${SSH_USER}@${SSH_HOST}:/tmp/distribute.py
+        download_file "python" "split-data.py" "${PTP_GITHUB_TOKEN}"
+        scp -q ${HOME}/split-data.py ${SSH_USER}@${SSH_HOST}:/tmp/split-data.py
         ;;
     *)
         echo "[ERROR] Unsupported tool: ${TOOL}"
@@ -142,7 +148,7 @@ echo "[INFO] Generating Container Name: ${CONTAINER_NAME}"
 echo "[INFO] Registering test run centrally..."
 DATA="{ \"repo\": \"${REPO}\", \"lac\": \"${LAC_ID}\", \"stream\": \"${STREAM}\", \"test\": \"${TEST_ID}\", \"type\": \"${TEST_TYPE}\", \"environment\": \"${ENVIRONMENT}\", \"triggered_by\": \"${USER}\", \"factor\": \"${FACTOR}\", \"dashboard_url\": \"${DASHBOARD_URL}\", \"location\": \"${LOCATION}\", \"container_name\": \"${CONTAINER_NAME}\", \"execution_type\": \"${EXECUTION_TYPE}\", \"workers\": ${WORKERS}, \"tool\": \"${TOOL}\", \"script_version\": \"${SCRIPT_VERSION}\" }"
 
-response=$(curl -s -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/register" \
+response=$(registry_curl -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/register" \
     -H 'accept: application/json' \
     -H 'Content-Type: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
@@ -152,6 +158,9 @@ response=$(curl -s -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/register" \
 if [[ "${response}" == *"Test registered"* ]]; then
     message=$(echo "${response}" | jq -r '.message // empty')
     RUN_ID=$(echo "${response}" | jq -r '.run_id // empty')
+    # Factor the registry allocated to each worker, in SLAVE_SERVERS order (weights of the test data split).
+    # Whole numbers keep a ".0": split-data.py reads a bare integer as a worker count
+    WORKER_FACTORS=$(echo "${response}" | jq -r '.worker_factors // [] | map(tostring | if test("^[0-9]+$") then . + ".0" else . end) | join(",")')
     test_id=$(echo "${response}" | jq -r '.test_id // empty')
     if [[ -z "${RUN_ID}" || -z "${test_id}" ]]; then
         echo "[ERROR] Registration failed! ${response}"
@@ -193,13 +202,16 @@ ssh -q ${SSH_USER}@${SSH_HOST} "/tmp/run-test-performance-${TOOL}.sh \
     \"${API_VERSION}\" \
     \"${VAULT_TOKEN}\" \
     \"${PTP_API_KEY}\" \
-    \"${AUTHENTICATION}\"" &
+    \"${AUTHENTICATION}\" \
+    \"${WORKER_FACTORS}\"" &
 
 SCRIPT_PID=$!
 
 # Poll API while script is running
 while kill -0 "$SCRIPT_PID" 2>/dev/null; do
-response=$(curl -s "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
+send_heartbeat "${RUN_ID}" "${PTP_API_KEY}"
+
+response=$(registry_curl "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -20,7 +20,7 @@ fi
 
 # Check if running performance tests is allowed
 echo "[INFO] Checking if performance tests are allowed..."
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -59,7 +59,7 @@ if [[ -z "${TOOL}" || -z "${TEST_DEFINITION_FILE}" || -z "${STREAM}" || -z "${EN
 fi
 
 echo "[INFO] Getting Orchestration Server..."
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/orchestrator?location=${LOCATION}&environment=${ENVIRONMENT}" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/orchestrator?location=${LOCATION}&environment=${ENVIRONMENT}" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -73,7 +73,7 @@ else
 fi
 
 # Get SSH_USER to connect to the orchestrator server and workers.
-response=$(curl -s -X 'GET' "$DPT_REGISTRY_URL/$API_VERSION/configuration/ssh_user" \
+response=$(registry_curl -X 'GET' "$DPT_REGISTRY_URL/$API_VERSION/configuration/ssh_user" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -124,7 +124,7 @@ echo "[INFO] Generating Container Name: ${CONTAINER_NAME}"
 echo "[INFO] Registering test run centrally..."
 DATA="{ \"repo\": \"${REPO}\", \"lac\": \"${LAC_ID}\", \"stream\": \"${STREAM}\", \"test\": \"${TEST_ID}\", \"type\": \"${TEST_TYPE}\", \"environment\": \"${ENVIRONMENT}\", \"triggered_by\": \"${USER}\", \"factor\": \"${FACTOR}\", \"dashboard_url\": \"${DASHBOARD_URL}\", \"location\": \"${LOCATION}\", \"container_name\": \"${CONTAINER_NAME}\", \"execution_type\": \"${EXECUTION_TYPE}\", \"workers\": ${WORKERS}, \"tool\": \"${TOOL}\", \"script_version\": \"${SCRIPT_VERSION}\" }"
 
-response=$(curl -s -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/register" \
+response=$(registry_curl -X 'POST' "${DPT_REGISTRY_URL}/${API_VERSION}/register" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json' \
@@ -175,7 +175,9 @@ SCRIPT_PID=$!
 
 # Poll API while script is running
 while kill -0 "$SCRIPT_PID" 2>/dev/null; do
-response=$(curl -s "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
+send_heartbeat "${RUN_ID}" "${PTP_API_KEY}"
+
+response=$(registry_curl "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/status" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')
@@ -88,7 +88,7 @@ match_time() {
 while IFS= read -r line || [[ -n "$line" ]]; do
   [[ "$line" =~ ^# ]] && continue
   schedule_time=$(echo $line | cut -d ' ' -f 1-5)
-  workflow=$(echo $line | cut -d ' ' -f 6- | tr -d '"')
+  workflow=$(echo "$line" | cut -d '"' -f 2)  # text after the closing quote is a comment
   if match_time "$current_time" "$schedule_time"; then
     matching_workflows+=("$workflow")
   fi
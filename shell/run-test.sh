@@ -34,7 +34,7 @@ else
 fi
 
 # Get VAULT URL .
-response=$(curl -s -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/vault_url" \
+response=$(registry_curl -X 'GET' "${DPT_REGISTRY_URL}/${API_VERSION}/configuration/vault_url" \
     -H 'accept: application/json' \
     -H "X-API-Key: ${PTP_API_KEY}" \
     -H 'Content-Type: application/json')